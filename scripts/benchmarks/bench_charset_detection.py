@@ -0,0 +1,74 @@
+"""
+Compare charset_normalizer's full detection with charset_detection's bounded early-exit
+mode and the per-host encoding memo, on kworb pages that declare no charset and carry
+artist names in a range of legacy encodings
+
+Every mode's decoded text is checked against the encoding the page was written in. The
+full detection column is what BeautifulSoup runs on such pages when handed raw bytes;
+it misreads some of them, which is reported rather than asserted.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from charset_normalizer import from_bytes
+
+from fixtures import kworb_track_page
+from charset_detection import detect_encoding
+from html_parsers import decode_markup, decode_stats
+from timing import best_time
+
+REPEATS = 3
+
+# Names as they would appear on a localized page, in the encoding that page is served in
+NAMES = {
+    'cp1252': 'Beyoncé, Rosé, Canción para él, Álvaro, Köln, naïve café',
+    'cp1251': 'Привет, это песня о любви, Москва',
+    'cp932': 'こんにちは、これは日本語の歌です。東京の夜空',
+    'cp949': '안녕하세요, 사랑과 우정에 관한 한국 노래, 서울의 밤',
+    'gb18030': '你好，这是一首关于爱情和友谊的中文歌曲，北京的夜晚',
+    'iso8859_7': 'Καλημέρα, αυτό είναι ένα ελληνικό τραγούδι',
+}
+
+def undeclared_page(encoding: str) -> bytes:
+    page = kworb_track_page(days=365).replace(b'<meta charset="utf-8">', b'', 1)
+    names = f'{NAMES[encoding]} '.encode(encoding) * 5
+    return page.replace(b'<title>', b'<title>' + names, 1)
+
+def full_detection(content: bytes):
+    best = from_bytes(content).best()
+    return best.encoding if best else None
+
+def main():
+    print(f"{'page encoding':<16}{'full ms':>10}{'correct':>9}{'early ms':>10}{'correct':>9}"
+          f"{'memo ms':>10}{'speedup':>10}")
+    totals = [0.0, 0.0, 0.0]
+    for encoding in NAMES:
+        content = undeclared_page(encoding)
+        expected = content.decode(encoding)
+
+        detected = full_detection(content)
+        full_ok = detected is not None and content.decode(detected, 'replace') == expected
+        early, _ = detect_encoding(content)
+        assert early is not None and content.decode(early) == expected, (encoding, early)
+
+        # One host per page: the first decode detects, every later one hits the memo
+        host = f'{encoding}.example'
+        assert decode_markup(content, host=host) == expected
+        assert decode_markup(content, host=host) == expected
+
+        full = best_time(lambda: full_detection(content), REPEATS)
+        bounded = best_time(lambda: detect_encoding(content), REPEATS)
+        memo = best_time(lambda: decode_markup(content, host=host), REPEATS)
+        for i, elapsed in enumerate((full, bounded, memo)):
+            totals[i] += elapsed
+        print(f"{encoding:<16}{full * 1000:>10.1f}{'yes' if full_ok else 'no':>9}{bounded * 1000:>10.1f}{'yes':>9}"
+              f"{memo * 1000:>10.1f}{full / bounded:>9.0f}x")
+
+    print(f"{'all pages':<16}{totals[0] * 1000:>10.1f}{'':>9}{totals[1] * 1000:>10.1f}{'':>9}"
+          f"{totals[2] * 1000:>10.1f}{totals[0] / totals[1]:>9.0f}x")
+    print(f"Decode paths taken: {decode_stats.stats()}")
+
+if __name__ == '__main__':
+    main()
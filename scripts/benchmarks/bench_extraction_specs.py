@@ -0,0 +1,122 @@
+"""
+Micro-benchmark of string patterns and selectors against the precompiled extraction specs
+
+Runs the MyStreamCount track info / related tracks extraction and kworb's Total row
+parsing on a prebuilt tree, once the way the scrapers used to (one select_one/select per
+field, pattern and selector strings looked up per call) and once through extraction_specs
+(compiled patterns, field specs extracted in a single walk), and checks both agree.
+
+    python scripts/benchmarks/bench_extraction_specs.py
+"""
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from bs4 import BeautifulSoup
+
+from details_scraper import MyStreamCountJSONScraper
+from extraction_specs import TRACK_PAGE_PLAN
+from fixtures import COUNTRIES, mystreamcount_track_page
+from html_parsers import HTML_PARSER
+from kworb_scraper import KworbScraper
+from timing import best_time
+
+REPEATS = 20
+
+def string_track_info(soup: BeautifulSoup) -> dict:
+    """_extract_track_info as written before extraction_specs"""
+    track_info = {}
+    title_elem = soup.select_one('h1.text-xl.font-bold.text-gray-900')
+    if title_elem:
+        track_info['title'] = title_elem.get_text().strip()
+    artist_elem = soup.select_one('p.text-md.text-gray-500.font-medium.mt-1 a')
+    if artist_elem:
+        track_info['artist'] = artist_elem.get_text().strip()
+        track_info['artist_url'] = artist_elem.get('href', '')
+    artwork_elem = soup.select_one('div.w-64.mx-auto img')
+    if artwork_elem:
+        track_info['artwork_url'] = artwork_elem.get('src', '')
+        track_info['album_name'] = artwork_elem.get('alt', '')
+    spotify_link = soup.select_one('div.w-64.mx-auto a')
+    if spotify_link:
+        track_info['spotify_url'] = spotify_link.get('href', '')
+    streams_text = soup.select_one('p.text-md.text-gray-900.my-4.px-4')
+    if streams_text:
+        text = streams_text.get_text()
+        streams_match = re.search(r'(\d{1,3}(?:,\d{3})*)\s*times on Spotify', text)
+        if streams_match:
+            track_info['total_streams'] = int(streams_match.group(1).replace(',', ''))
+            track_info['streams_text'] = text.strip()
+    release_match = re.search(r'since its release on (.+?)\.', streams_text.get_text() if streams_text else '')
+    if release_match:
+        track_info['release_date'] = release_match.group(1)
+    return track_info
+
+def string_related_tracks(soup: BeautifulSoup) -> list:
+    """_extract_related_tracks as written before extraction_specs"""
+    related_tracks = []
+    for track_item in soup.select('ul.divide-y.divide-gray-100 li'):
+        track_data = {}
+        img_elem = track_item.select_one('img')
+        if img_elem:
+            track_data['artwork_url'] = img_elem.get('src', '')
+            track_data['album_name'] = img_elem.get('alt', '')
+        title_link = track_item.select_one('p.text-md.font-semibold a')
+        if title_link:
+            track_data['title'] = title_link.get_text().strip()
+            track_data['url'] = title_link.get('href', '')
+            track_id_match = re.search(r'/track/([a-zA-Z0-9]+)', track_data['url'])
+            if track_id_match:
+                track_data['track_id'] = track_id_match.group(1)
+        artist_elem = track_item.select_one('p.text-sm.text-gray-500')
+        if artist_elem:
+            track_data['artist'] = artist_elem.get_text().strip()
+        if track_data:
+            related_tracks.append(track_data)
+    return related_tracks
+
+def string_total_row_streams(country_columns: list, cell_texts: list) -> dict:
+    """KworbScraper._total_row_streams as written before extraction_specs"""
+    country_streams = {}
+    for col_index, country_code in country_columns:
+        if col_index < len(cell_texts):
+            stream_text = cell_texts[col_index]
+            stream_match = re.search(r'([\d,]+)', stream_text)
+            if stream_match:
+                country_streams[country_code] = {
+                    'streams': int(stream_match.group(1).replace(',', '')),
+                    'raw_text': stream_text
+                }
+    return country_streams
+
+def main():
+    scraper = MyStreamCountJSONScraper()
+    kworb = KworbScraper()
+    soup = BeautifulSoup(mystreamcount_track_page(related=100, chart_days=30), HTML_PARSER)
+
+    # A Total row with every country kworb lists, repeated to mimic a page of wide tables
+    countries = COUNTRIES * 4
+    country_columns = [(i, code) for i, code in enumerate(countries, 1)]
+    cell_texts = ['Total'] + [f'{(i + 1) * 1234567:,}' for i in range(len(countries))]
+
+    cases = [
+        ('track info', lambda: string_track_info(soup), lambda: scraper._extract_track_info(soup)),
+        ('related tracks (100)', lambda: string_related_tracks(soup), lambda: scraper._extract_related_tracks(soup)),
+        ('track page (info + related)', lambda: {**string_track_info(soup), 'related_tracks': string_related_tracks(soup)},
+         lambda: TRACK_PAGE_PLAN.run(soup)),
+        (f'kworb total row ({len(countries)} cells)', lambda: string_total_row_streams(country_columns, cell_texts),
+         lambda: kworb._total_row_streams(country_columns, cell_texts)),
+    ]
+
+    print(f"{'case':<30}{'strings ms':>12}{'compiled ms':>13}{'speedup':>10}")
+    for name, strings, compiled in cases:
+        if strings() != compiled():
+            raise SystemExit(f"{name}: compiled specs disagree with the string version")
+        before = best_time(strings, REPEATS)
+        after = best_time(compiled, REPEATS)
+        print(f"{name:<30}{before * 1000:>12.3f}{after * 1000:>13.3f}{before / after:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
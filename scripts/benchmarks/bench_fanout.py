@@ -0,0 +1,91 @@
+"""
+Compare fanning a per-track action out over a thread pool, as the batch action does, with
+gathering async_scrapers' wrappers on one event loop
+
+Both run the pooled scrapers against replayed fixtures with simulated latency, capped at
+the same number of calls in flight per host: MAX_BATCH_WORKERS for MyStreamCount and
+KWORB_BATCH_WORKERS for kworb. Requests are paced by SCRAPER_DELAY, 0 here unless
+--delay is given. Results are checked to be the same for both.
+
+    python scripts/benchmarks/bench_fanout.py
+    python scripts/benchmarks/bench_fanout.py --latency-ms 100 --tracks 16 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from fixtures import kworb_track_page, mystreamcount_streams_api, mystreamcount_track_page
+from timing import best_time
+
+HTML = {'Content-Type': 'text/html; charset=utf-8'}
+JSON = {'Content-Type': 'application/json'}
+
+ACTIONS = ['stream_count', 'kworb']
+
+def mount_fixtures(latency: float) -> None:
+    """Answer the pooled scrapers' requests from fixtures"""
+    from lambda_function import SCRAPER_FACTORIES, scraper_pool
+    from replay import mount_replay
+
+    page = mystreamcount_track_page(chart_days=730)
+    api = mystreamcount_streams_api(chart_days=730)
+    kworb = kworb_track_page(days=365)
+    routes = {
+        'mystreamcount': [
+            ('GET', r'mystreamcount\.com/track/', lambda r, m: (200, HTML, page)),
+            ('POST', r'mystreamcount\.com/api/track/[^/]+/streams', lambda r, m: (200, JSON, api))
+        ],
+        'kworb': [('GET', r'kworb\.net/spotify/track/', lambda r, m: (200, HTML, kworb))]
+    }
+    for name, scraper_routes in routes.items():
+        scraper = scraper_pool.get(name, SCRAPER_FACTORIES[name])
+        mount_replay(scraper.session, scraper_routes, latency)
+        scraper_pool.report(name, scraper, healthy=True)
+
+def strip_volatile(results: list) -> list:
+    """Results without the timestamps that differ between runs"""
+    return [{key: value for key, value in result.items() if key not in ('scraped_at', 'retrieved_at')}
+            for result in results]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark thread pool and asyncio fan-out of the scrapers')
+    parser.add_argument('--tracks', type=int, nargs='+', default=[8, 32], help='Tracks per fan-out')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Simulated network latency per request')
+    parser.add_argument('--delay', type=float, default=0, help='SCRAPER_DELAY, seconds between requests per host')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per measurement (default: 3)')
+    args = parser.parse_args()
+
+    # Read when lambda_function is imported
+    os.environ['SCRAPER_DELAY'] = str(args.delay)
+    import async_scrapers
+    from lambda_function import run_track_action
+
+    mount_fixtures(args.latency_ms / 1000)
+
+    def threads(action, track_ids):
+        workers = min(async_scrapers.HOST_CONCURRENCY[async_scrapers.ACTION_SCRAPERS[action]], len(track_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda track_id: run_track_action(action, track_id), track_ids))
+
+    def gathered(action, track_ids):
+        async def run():
+            return await asyncio.gather(*(async_scrapers.run_track_action_async(action, track_id)
+                                          for track_id in track_ids))
+        return list(asyncio.run(run()))
+
+    print(f"Latency {args.latency_ms:.0f} ms, SCRAPER_DELAY {args.delay} s")
+    print(f"{'action':<14}{'tracks':>8}{'threads ms':>14}{'asyncio ms':>14}")
+    for action in ACTIONS:
+        for count in args.tracks:
+            track_ids = [f'bench{i}' for i in range(count)]
+            assert strip_volatile(threads(action, track_ids)) == strip_volatile(gathered(action, track_ids)), action
+            thread_time = best_time(lambda: threads(action, track_ids), args.repeats)
+            async_time = best_time(lambda: gathered(action, track_ids), args.repeats)
+            print(f"{action:<14}{count:>8}{thread_time * 1000:>14.1f}{async_time * 1000:>14.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare BeautifulSoup tree builders on the kworb and MyStreamCount fixtures
+
+Also compares handing BeautifulSoup raw bytes (UnicodeDammit, plus charset_normalizer when
+nothing is declared) with decoding through html_parsers.decode_markup first, for pages
+with and without a charset declaration.
+
+Only builders that import are measured. To include lxml locally, put an installed lxml
+ahead of the source-only vendored copy, e.g.
+
+    pip install --target /tmp/lxml lxml
+    PYTHONPATH=/tmp/lxml python scripts/benchmarks/bench_html_parsers.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+from fixtures import kworb_track_page, mystreamcount_track_page
+from details_scraper import MyStreamCountJSONScraper
+from html_parsers import PREFERRED_PARSERS, decode_markup, decode_stats, make_soup, select_parser
+from kworb_scraper import KworbScraper
+from timing import best_time
+
+REPEATS = 5
+
+def kworb_case(parser: str, mode: str, content: bytes):
+    scraper = KworbScraper(parse_mode=mode)
+    scraper.html_parser = parser
+    return lambda: scraper._extract_country_streams(scraper._parse(content))
+
+def mystreamcount_case(parser: str, content: bytes):
+    scraper = MyStreamCountJSONScraper()
+
+    def run():
+        soup = BeautifulSoup(content, parser)
+        scraper._extract_track_info(soup)
+        scraper._extract_streaming_data(soup)
+        scraper._extract_related_tracks(soup)
+    return run
+
+def strip_declaration(content: bytes) -> bytes:
+    return content.replace(b'<meta charset="utf-8">', b'', 1)
+
+def with_non_ascii(content: bytes) -> bytes:
+    """Real pages carry artist names and flags; pure ASCII lets detection finish early"""
+    names = ' '.join(['Beyonc\u00e9', 'Ros\u00e9', 'Canci\u00f3n', '\u00c1lvaro', 'K\u00f6ln', '\u2013']) * 20
+    return content.replace(b'<title>', f'<title>{names} '.encode('utf-8'), 1)
+
+def decoding_cases(parser: str) -> None:
+    kworb_page = kworb_track_page(days=365)
+    msc_page = mystreamcount_track_page(related=40, chart_days=730)
+    latin_page = with_non_ascii(strip_declaration(msc_page)).decode('utf-8').encode('latin-1', 'replace')
+    # (name, body, Content-Type header, actual encoding)
+    cases = [
+        ('kworb, meta charset', kworb_page, None, 'utf-8'),
+        ('kworb, undeclared', strip_declaration(kworb_page), None, 'utf-8'),
+        ('kworb, undeclared non-ASCII', with_non_ascii(strip_declaration(kworb_page)), None, 'utf-8'),
+        ('mystreamcount, non-ASCII', with_non_ascii(strip_declaration(msc_page)), None, 'utf-8'),
+        ('mystreamcount, latin-1 header', latin_page, 'text/html; charset=ISO-8859-1', 'latin-1'),
+    ]
+
+    # Raw bytes never see the Content-Type header, so undeclared non-UTF-8 pages go
+    # through charset_normalizer's pure Python mess detection
+    print(f"\nDecoding with {parser}")
+    print(f"{'case':<30}{'bytes ms':>12}{'fast path ms':>14}{'speedup':>10}")
+    for name, content, content_type, encoding in cases:
+        assert str(make_soup(content, parser, content_type)) == str(BeautifulSoup(content.decode(encoding), parser))
+        before = best_time(lambda: BeautifulSoup(content, parser), REPEATS)
+        after = best_time(lambda: make_soup(content, parser, content_type), REPEATS)
+        print(f"{name:<30}{before * 1000:>12.1f}{after * 1000:>14.1f}{before / after:>9.1f}x")
+
+    # A body that fails its declared charset goes through bounded detection
+    decode_markup('<meta charset="utf-8">caf\u00e9'.encode('latin-1'))
+    print(f"Decode paths taken: {decode_stats.stats()}")
+
+def main():
+    parsers = [parser for parser in PREFERRED_PARSERS if builder_registry.lookup(parser) is not None]
+    print(f"Available builders: {', '.join(parsers)} (selected: {select_parser()})")
+
+    kworb_page = kworb_track_page(days=365)
+    msc_page = mystreamcount_track_page(related=40, chart_days=730)
+    cases = [
+        ('kworb full 365d', lambda parser: kworb_case(parser, 'full', kworb_page)),
+        ('kworb strained 365d', lambda parser: kworb_case(parser, 'strained', kworb_page)),
+        ('mystreamcount 730d', lambda parser: mystreamcount_case(parser, msc_page)),
+    ]
+
+    print(f"{'case':<22}" + ''.join(f"{parser + ' ms':>16}" for parser in parsers) + f"{'speedup':>10}")
+    for name, make in cases:
+        timings = [best_time(make(parser), REPEATS) for parser in parsers]
+        speedup = f"{timings[-1] / timings[0]:.1f}x" if len(timings) > 1 else '-'
+        print(f"{name:<22}" + ''.join(f"{t * 1000:>16.1f}" for t in timings) + f"{speedup:>10}")
+
+    decoding_cases(select_parser())
+
+if __name__ == '__main__':
+    main()
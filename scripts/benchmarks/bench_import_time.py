@@ -0,0 +1,68 @@
+"""
+Cold start import cost of the Lambda handler
+
+Each measurement runs in a fresh interpreter with -X importtime, the same way a new
+Lambda container imports lambda_function. Reports the median wall time per scenario and
+the modules with the largest cumulative import time for the scraper imports that
+lambda_function now defers until a scraping action runs.
+
+    python scripts/benchmarks/bench_import_time.py
+    python scripts/benchmarks/bench_import_time.py --top 25 --repeats 9
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+LAMBDA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+SCENARIOS = [
+    ('import lambda_function', 'import lambda_function'),
+    ('health request', "import lambda_function; lambda_function.lambda_handler({'queryStringParameters': {'action': 'health'}}, None)"),
+    ('OPTIONS preflight', "import lambda_function; lambda_function.lambda_handler({'httpMethod': 'OPTIONS'}, None)"),
+    ('lambda_function + scrapers', 'import lambda_function; lambda_function.load_scraper_classes()'),
+]
+
+def run_importtime(code: str) -> list:
+    """Run code in a fresh interpreter and return (self_us, cumulative_us, module) per import"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import logging; logging.disable(logging.CRITICAL); {code}'],
+        cwd=LAMBDA_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return imports
+
+def total_us(imports: list) -> int:
+    """Sum of top-level imports, i.e. those not nested under another import"""
+    return sum(cumulative for _, cumulative, module in imports if not module.startswith('  '))
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold start import cost of lambda_function')
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters per scenario (default: 5)')
+    parser.add_argument('--top', type=int, default=15, help='Slowest modules listed (default: 15)')
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first scenario does not pay for compilation
+    run_importtime('import lambda_function; lambda_function.load_scraper_classes()')
+
+    print(f"{'scenario':<30}{'import ms':>12}{'modules':>10}")
+    for name, code in SCENARIOS:
+        runs = [run_importtime(code) for _ in range(args.repeats)]
+        milliseconds = statistics.median(total_us(imports) for imports in runs) / 1000
+        print(f"{name:<30}{milliseconds:>12.1f}{len(runs[0]):>10}")
+
+    imports = run_importtime('import lambda_function; lambda_function.load_scraper_classes()')
+    print(f"\nSlowest imports once the scrapers load (cumulative ms, self ms):")
+    for self_us, cumulative_us, module in sorted(imports, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}{self_us / 1000:>10.1f}  {module}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare KworbScraper parse modes on synthetic kworb pages
+
+Reports tree size, bytes consumed, parse time, extraction time and peak traced memory
+per page size. Stream mode builds no tree, so its parse time covers extraction too.
+
+    python scripts/benchmarks/bench_kworb_parse.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from fixtures import kworb_track_page
+from kworb_scraper import KworbScraper, PARSE_MODES
+
+PAGE_DAYS = [30, 365, 1500]
+REPEATS = 5
+CHUNK_SIZE = 16384
+
+def chunked(content: bytes):
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE]
+
+def run_once(scraper: KworbScraper, content: bytes) -> dict:
+    if scraper.parse_mode == 'stream':
+        started = time.perf_counter()
+        countries, bytes_read = scraper._extract_country_streams_incremental(chunked(content))
+        return {'parse': time.perf_counter() - started, 'extract': 0.0, 'nodes': 0,
+                'bytes': bytes_read, 'countries': len(countries)}
+
+    started = time.perf_counter()
+    soup = scraper._parse(content)
+    parsed = time.perf_counter()
+    countries = scraper._extract_country_streams(soup)
+    return {'parse': parsed - started, 'extract': time.perf_counter() - parsed,
+            'nodes': sum(1 for _ in soup.descendants), 'bytes': len(content), 'countries': len(countries)}
+
+def measure(scraper: KworbScraper, content: bytes) -> dict:
+    runs = [run_once(scraper, content) for _ in range(REPEATS)]
+
+    tracemalloc.start()
+    run_once(scraper, content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = dict(runs[0])
+    result['parse'] = min(run['parse'] for run in runs)
+    result['extract'] = min(run['extract'] for run in runs)
+    result['peak'] = peak
+    return result
+
+def main():
+    print(f"{'days':>6} {'size_kb':>8} {'mode':>9} {'nodes':>8} {'read_kb':>8} {'parse_ms':>9} "
+          f"{'extract_ms':>11} {'peak_kb':>9} {'countries':>9}")
+    for days in PAGE_DAYS:
+        content = kworb_track_page(days=days)
+        for mode in PARSE_MODES:
+            result = measure(KworbScraper(parse_mode=mode), content)
+            print(f"{days:>6} {len(content) / 1024:>8.0f} {mode:>9} {result['nodes']:>8} "
+                  f"{result['bytes'] / 1024:>8.0f} {result['parse'] * 1000:>9.1f} "
+                  f"{result['extract'] * 1000:>11.2f} {result['peak'] / 1024:>9.0f} {result['countries']:>9}")
+
+if __name__ == '__main__':
+    main()
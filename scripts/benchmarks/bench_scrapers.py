@@ -0,0 +1,260 @@
+"""
+Offline benchmark of the scraper hot paths
+
+Replays kworb and MyStreamCount fixtures through a requests transport adapter and reports,
+per page size, parse time, extraction time, end-to-end latency, peak traced allocations
+and upstream requests/bytes for:
+
+  - KworbScraper.get_top_streaming_country in every parse mode
+  - MyStreamCountJSONScraper.scrape_track
+  - both of the above with the parsed result cache warm ('cached' cases)
+  - MyStreamCountJSONScraper.get_chart_data_only with a cold and a warm CSRF token cache
+
+Pages come from fixtures.py at several sizes, plus any real pages saved with --record.
+No recorded pages are committed: they would only capture one track on one day, while the
+synthetic ones reproduce the markup the scrapers read at the page sizes that matter. Run
+--record once with network access to add 'recorded' rows next to the synthetic ones.
+
+    python scripts/benchmarks/bench_scrapers.py
+    python scripts/benchmarks/bench_scrapers.py --record 0phzfJn8NeT1LkbqfV2peI
+    python scripts/benchmarks/bench_scrapers.py --save baseline.json
+    python scripts/benchmarks/bench_scrapers.py --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '..', 'lambda-scraper-final'))
+
+from bs4 import BeautifulSoup
+
+import details_scraper
+from details_scraper import MyStreamCountJSONScraper
+from fixtures import kworb_track_page, mystreamcount_streams_api, mystreamcount_track_page
+from kworb_scraper import KworbScraper, PARSE_MODES
+from parsed_cache import ParsedResultCache
+from replay import mount_replay
+from timing import timed
+
+RECORDED_DIR = os.path.join(BENCH_DIR, 'recorded')
+RECORDED_FILES = {
+    'kworb': 'kworb_track.html',
+    'page': 'mystreamcount_track.html',
+    'api': 'mystreamcount_streams.json'
+}
+
+KWORB_DAYS = [30, 365, 1500]
+CHUNK_SIZE = 16384
+MYSTREAMCOUNT_DAYS = [90, 730, 2000]
+
+# Differences smaller than these are treated as noise when comparing against a baseline
+MIN_REGRESSION_DELTA = {'e2e_ms': 2.0, 'peak_kb': 64, 'kb_per_call': 1}
+
+HTML = {'Content-Type': 'text/html; charset=utf-8'}
+JSON = {'Content-Type': 'application/json'}
+
+def load_recorded() -> dict:
+    recorded = {}
+    for kind, filename in RECORDED_FILES.items():
+        path = os.path.join(RECORDED_DIR, filename)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                recorded[kind] = f.read()
+    return recorded
+
+def record(track_id: str) -> None:
+    """Save live pages for a track so later runs can replay real markup"""
+    os.makedirs(RECORDED_DIR, exist_ok=True)
+    kworb = KworbScraper()
+    scraper = MyStreamCountJSONScraper(delay=0)
+
+    bodies = {
+        'kworb': kworb.session.get(f'https://kworb.net/spotify/track/{track_id}.html', timeout=30).content,
+        'page': scraper.session.get(f'https://www.mystreamcount.com/track/{track_id}', timeout=30).content
+    }
+    soup = BeautifulSoup(bodies['page'], scraper.html_parser)
+    token = scraper._find_csrf_token(soup)
+    bodies['api'] = scraper.session.post(f'https://www.mystreamcount.com/api/track/{track_id}/streams',
+                                         data={'_token': token}, timeout=30).content
+
+    for kind, body in bodies.items():
+        with open(os.path.join(RECORDED_DIR, RECORDED_FILES[kind]), 'wb') as f:
+            f.write(body)
+        print(f"Recorded {RECORDED_FILES[kind]} ({len(body) / 1024:.0f} KB)")
+
+def peak_allocations(fn) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def uncached() -> ParsedResultCache:
+    """A parsed result cache that stores nothing, so every call parses"""
+    return ParsedResultCache(max_bytes=0)
+
+def kworb_cases(label: str, page: bytes, repeats: int, latency: float) -> list:
+    rows = []
+    for mode in PARSE_MODES:
+        scraper = KworbScraper(delay=0, parse_mode=mode)
+        scraper.parsed_cache = uncached()
+        adapter = mount_replay(scraper.session, [('GET', r'kworb\.net/spotify/track/', lambda r, m: (200, HTML, page))],
+                               latency)
+
+        if mode == 'stream':
+            chunks = [page[start:start + CHUNK_SIZE] for start in range(0, len(page), CHUNK_SIZE)]
+            parse_times = timed(lambda: scraper._extract_country_streams_incremental(chunks), repeats)
+            extract_times = [0.0]
+        else:
+            soup = scraper._parse(page)
+            parse_times = timed(lambda: scraper._parse(page), repeats)
+            extract_times = timed(lambda: scraper._extract_country_streams(soup), repeats)
+
+        adapter.requests = adapter.bytes_served = 0
+        e2e_times = timed(lambda: scraper.get_top_streaming_country('bench'), repeats)
+        rows.append(result_row(f'kworb/{mode}', label, len(page), parse_times, extract_times, e2e_times,
+                               peak_allocations(lambda: scraper.get_top_streaming_country('bench')),
+                               adapter, repeats))
+
+    scraper = KworbScraper(delay=0)
+    scraper.parsed_cache = ParsedResultCache()
+    adapter = mount_replay(scraper.session, [('GET', r'kworb\.net/spotify/track/', lambda r, m: (200, HTML, page))],
+                           latency)
+    scraper.get_top_streaming_country('bench')
+    adapter.requests = adapter.bytes_served = 0
+    rows.append(result_row('kworb/cached', label, len(page), [0.0], [0.0],
+                           timed(lambda: scraper.get_top_streaming_country('bench'), repeats),
+                           peak_allocations(lambda: scraper.get_top_streaming_country('bench')), adapter, repeats))
+    return rows
+
+def mystreamcount_cases(label: str, page: bytes, api: bytes, repeats: int, latency: float) -> list:
+    routes = [
+        ('GET', r'mystreamcount\.com/track/', lambda r, m: (200, HTML, page)),
+        ('POST', r'mystreamcount\.com/api/track/[^/]+/streams', lambda r, m: (200, JSON, api))
+    ]
+    rows = []
+
+    scraper = MyStreamCountJSONScraper(delay=0)
+    scraper.parsed_cache = uncached()
+    adapter = mount_replay(scraper.session, routes, latency)
+    soup = BeautifulSoup(page, scraper.html_parser)
+
+    def extract():
+        scraper._extract_track_info(soup)
+        scraper._extract_streaming_data(soup)
+        scraper._extract_related_tracks(soup)
+
+    parse_times = timed(lambda: BeautifulSoup(page, scraper.html_parser), repeats)
+    extract_times = timed(extract, repeats)
+    e2e_times = timed(lambda: scraper.scrape_track('bench'), repeats)
+    rows.append(result_row('scrape_track', label, len(page), parse_times, extract_times, e2e_times,
+                           peak_allocations(lambda: scraper.scrape_track('bench')), adapter, repeats))
+
+    scraper.parsed_cache = ParsedResultCache()
+    scraper.scrape_track('bench')
+    adapter.requests = adapter.bytes_served = 0
+    rows.append(result_row('scrape_track/cached', label, len(page), [0.0], [0.0],
+                           timed(lambda: scraper.scrape_track('bench'), repeats),
+                           peak_allocations(lambda: scraper.scrape_track('bench')), adapter, repeats))
+
+    def chart_cold():
+        details_scraper.csrf_token_cache.invalidate('www.mystreamcount.com')
+        scraper.get_chart_data_only('bench')
+
+    adapter.requests = adapter.bytes_served = 0
+    rows.append(result_row('chart_data/cold', label, len(page), [0.0], [0.0], timed(chart_cold, repeats),
+                           peak_allocations(chart_cold), adapter, repeats))
+
+    scraper.get_chart_data_only('bench')
+    adapter.requests = adapter.bytes_served = 0
+    rows.append(result_row('chart_data/warm', label, len(api), [0.0], [0.0],
+                           timed(lambda: scraper.get_chart_data_only('bench'), repeats),
+                           peak_allocations(lambda: scraper.get_chart_data_only('bench')), adapter, repeats))
+    return rows
+
+def result_row(case: str, label: str, size: int, parse_times: list, extract_times: list, e2e_times: list,
+               peak: int, adapter, repeats: int) -> dict:
+    return {
+        'case': case,
+        'size': label,
+        'page_kb': round(size / 1024, 1),
+        'parse_ms': round(min(parse_times) * 1000, 2),
+        'extract_ms': round(min(extract_times) * 1000, 2),
+        'e2e_ms': round(statistics.median(e2e_times) * 1000, 2),
+        'peak_kb': round(peak / 1024, 1),
+        # Allocation pass included, hence repeats + 1
+        'requests_per_call': round(adapter.requests / (repeats + 1), 2),
+        'kb_per_call': round(adapter.bytes_served / (repeats + 1) / 1024, 1)
+    }
+
+def print_rows(rows: list) -> None:
+    columns = ['case', 'size', 'page_kb', 'parse_ms', 'extract_ms', 'e2e_ms', 'peak_kb', 'requests_per_call', 'kb_per_call']
+    widths = [20, 10, 8, 9, 11, 9, 9, 18, 12]
+    print(''.join(f'{column:>{width}}' for column, width in zip(columns, widths)))
+    for row in rows:
+        print(''.join(f'{row[column]!s:>{width}}' for column, width in zip(columns, widths)))
+
+def compare(rows: list, baseline_file: str, tolerance: float) -> bool:
+    """Report cases slower or hungrier than the baseline by more than tolerance"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(row['case'], row['size']): row for row in json.load(f)}
+
+    regressions = []
+    for row in rows:
+        base = baseline.get((row['case'], row['size']))
+        if not base:
+            continue
+        for metric, min_delta in MIN_REGRESSION_DELTA.items():
+            if row[metric] > base[metric] * (1 + tolerance) and row[metric] - base[metric] > min_delta:
+                regressions.append(f"{row['case']} [{row['size']}] {metric}: {base[metric]} -> {row[metric]}")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {tolerance:.0%} against {baseline_file}")
+    return not regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against replayed fixtures')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per measurement (default: 5)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Simulated network latency per request')
+    parser.add_argument('--record', metavar='TRACK_ID', help='Save live pages for a track as fixtures and exit')
+    parser.add_argument('--save', help='Write results as JSON to use as a baseline')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs baseline (default: 0.25)')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return
+
+    latency = args.latency_ms / 1000
+    rows = []
+    for days in KWORB_DAYS:
+        rows += kworb_cases(f'{days}d', kworb_track_page(days=days), args.repeats, latency)
+    for days in MYSTREAMCOUNT_DAYS:
+        rows += mystreamcount_cases(f'{days}d', mystreamcount_track_page(chart_days=days),
+                                    mystreamcount_streams_api(chart_days=days), args.repeats, latency)
+
+    recorded = load_recorded()
+    if 'kworb' in recorded:
+        rows += kworb_cases('recorded', recorded['kworb'], args.repeats, latency)
+    if 'page' in recorded and 'api' in recorded:
+        rows += mystreamcount_cases('recorded', recorded['page'], recorded['api'], args.repeats, latency)
+
+    print_rows(rows)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.compare and not compare(rows, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
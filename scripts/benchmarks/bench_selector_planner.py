@@ -0,0 +1,74 @@
+"""
+Compare soupsieve's select_one/select with selector_planner's native matching, walking
+a LeanSoup and answered from an indexed one, for the Tailwind selectors the
+MyStreamCount track page is read with
+
+Parsing is not timed; the indexed timings include building the index on the first
+query. Results are checked to be the same elements in the same order, also for
+selectors that reach the document root, on the track page and on a fragment with
+top-level elements.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from bs4 import BeautifulSoup
+
+from extraction_specs import RELATED_TRACKS_RECORD, TRACK_INFO_FIELDS
+from fixtures import mystreamcount_track_page
+from html_parsers import HTML_PARSER
+from lean_tree import LeanSoup
+from timing import best_time
+
+REPEATS = 5
+SELECTORS = sorted({field.selector for field in TRACK_INFO_FIELDS}) + [RELATED_TRACKS_RECORD.selector]
+# A bare * compound matches the BeautifulSoup object itself, as in soupsieve
+ROOT_SELECTORS = ['* div', '* > html', '* .a', '* > p.a', '* *', 'html', '* > * > body']
+FRAGMENT = '<p class="a">top</p><div class="a"><p class="b">inner</p></div>'
+
+def first_matches(soup):
+    """select_one per selector, as the extractors did before extraction plans"""
+    return [soup.select_one(selector) for selector in SELECTORS]
+
+def all_matches(soup):
+    return [soup.select(selector) for selector in SELECTORS]
+
+def related_fields(soup):
+    """select_one for every related track field inside every related track item"""
+    return [[item.select_one(field.selector) for field in RELATED_TRACKS_RECORD.fields]
+            for item in soup.select(RELATED_TRACKS_RECORD.selector)]
+
+def builds_for(markup):
+    return [
+        ('soupsieve', lambda: BeautifulSoup(markup, HTML_PARSER)),
+        ('planner', lambda: LeanSoup(markup, HTML_PARSER)),
+        ('indexed', lambda: LeanSoup(markup, HTML_PARSER, indexed=True)),
+    ]
+
+def check_root_selectors(markup):
+    """The planner's answers for ROOT_SELECTORS, which are not timed, match soupsieve's"""
+    builds = builds_for(markup)
+    for selector in ROOT_SELECTORS:
+        expected = repr((builds[0][1]().select(selector), builds[0][1]().select_one(selector)))
+        for _, build in builds[1:]:
+            soup = build()
+            assert repr((soup.select(selector), soup.select_one(selector))) == expected, selector
+
+def main():
+    markup = mystreamcount_track_page(related=100, chart_days=730).decode('utf-8')
+    builds = builds_for(markup)
+    check_root_selectors(markup)
+    check_root_selectors(FRAGMENT)
+
+    print(f"Parser: {HTML_PARSER}")
+    print(f"{'case':<16}" + ''.join(f"{name + ' ms':>16}" for name, _ in builds))
+    for name, queries in [('select_one', first_matches), ('select', all_matches), ('related fields', related_fields)]:
+        expected = repr(queries(builds[0][1]()))
+        for _, build in builds[1:]:
+            assert repr(queries(build())) == expected, name
+        times = [best_time(queries, REPEATS, setup=build) for _, build in builds]
+        print(f"{name:<16}" + ''.join(f"{seconds * 1000:>16.2f}" for seconds in times))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare find_all/select on a plain LeanSoup with the same queries answered from its
+soup_index.DocumentIndex
+
+The indexed timings include building the index on the first query, as a scraper pays
+it. Results are checked to be the same elements in the same order.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from fixtures import kworb_track_page, mystreamcount_track_page
+from html_parsers import HTML_PARSER
+from kworb_scraper import KworbScraper
+from lean_tree import LeanSoup
+from timing import best_time
+
+REPEATS = 3
+
+def every_row_cells(soup):
+    """What reading a kworb history table does: rows per table, cells per row"""
+    return [[row.find_all(['td', 'th']) for row in table.find_all('tr')] for table in soup.find_all('table')]
+
+def track_page_lookups(soup):
+    """Repeated single-compound lookups, as the MyStreamCount extractors used to make"""
+    return [
+        soup.select_one('h1.text-xl.font-bold.text-gray-900'),
+        soup.select_one('div.w-64.mx-auto'),
+        soup.select('ul.divide-y.divide-gray-100'),
+        soup.find_all('li'),
+        soup.find_all('img'),
+        soup.find_all('a', class_='text-sm'),
+        soup.find('script'),
+    ] + [item.find('p', class_='text-sm') for item in soup.find_all('li')]
+
+def main():
+    kworb = KworbScraper(parse_mode='full')
+    cases = [
+        ('kworb extract 365d', kworb_track_page(days=365), kworb._extract_country_streams),
+        ('kworb extract 1095d', kworb_track_page(days=1095), kworb._extract_country_streams),
+        ('kworb all cells 365d', kworb_track_page(days=365), every_row_cells),
+        ('mystreamcount lookups', mystreamcount_track_page(related=40, chart_days=730), track_page_lookups),
+    ]
+
+    print(f"Parser: {HTML_PARSER}")
+    print(f"{'case':<24}{'walk ms':>10}{'indexed ms':>12}{'speedup':>10}")
+    for name, content, queries in cases:
+        markup = content.decode('utf-8')
+        plain_result = queries(LeanSoup(markup, HTML_PARSER))
+        indexed_result = queries(LeanSoup(markup, HTML_PARSER, indexed=True))
+        assert repr(plain_result) == repr(indexed_result), name
+
+        walk = best_time(queries, REPEATS, setup=lambda: LeanSoup(markup, HTML_PARSER))
+        indexed = best_time(queries, REPEATS, setup=lambda: LeanSoup(markup, HTML_PARSER, indexed=True))
+        print(f"{name:<24}{walk * 1000:>10.1f}{indexed * 1000:>12.1f}{walk / indexed:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare the memory a parsed tree holds with BeautifulSoup's default node classes, with
+line numbers off only, and as a lean_tree.LeanSoup, on kworb history pages of growing
+length and a MyStreamCount track page
+
+Memory is what tracemalloc sees allocated by the parse and still held by the tree, which
+is what a warm Lambda's peak RSS grows with. Every lean tree is checked to serialize to
+the same markup as the default one.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-scraper-final'))
+
+from bs4 import BeautifulSoup
+
+from fixtures import kworb_track_page, mystreamcount_track_page
+from html_parsers import HTML_PARSER
+from lean_tree import LeanSoup
+
+def measure(build):
+    """(MB held by the tree, parse seconds without tracing, tree)"""
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    tree = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held / 1024 / 1024, elapsed, tree
+
+def main():
+    print(f"Parser: {HTML_PARSER}")
+    print(f"{'page':<22}{'nodes':>9}{'default MB':>12}{'no lines MB':>13}{'lean MB':>10}{'saved':>8}"
+          f"{'default ms':>12}{'lean ms':>10}")
+    cases = [
+        ('kworb 365d', kworb_track_page(days=365)),
+        ('kworb 1095d', kworb_track_page(days=1095)),
+        ('mystreamcount 730d', mystreamcount_track_page(related=40, chart_days=730)),
+    ]
+    for name, content in cases:
+        markup = content.decode('utf-8')
+        default_mb, default_s, tree = measure(lambda: BeautifulSoup(markup, HTML_PARSER))
+        no_lines_mb, _, _ = measure(lambda: BeautifulSoup(markup, HTML_PARSER, store_line_numbers=False))
+        lean_mb, lean_s, lean_tree = measure(lambda: LeanSoup(markup, HTML_PARSER))
+        assert str(lean_tree) == str(tree)
+
+        nodes = sum(1 for _ in tree.descendants)
+        print(f"{name:<22}{nodes:>9}{default_mb:>12.1f}{no_lines_mb:>13.1f}{lean_mb:>10.1f}"
+              f"{1 - lean_mb / default_mb:>7.0%}{default_s * 1000:>12.0f}{lean_s * 1000:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic pages shaped like the upstream sites, for benchmarking without network access
+
+The markup mirrors what the scrapers look for: kworb's country table with a header
+row, Total and Peak rows and one row per day, and MyStreamCount's track page.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+COUNTRIES = [
+    'US', 'GB', 'DE', 'FR', 'CA', 'AU', 'BR', 'MX', 'ES', 'IT', 'NL', 'SE', 'NO', 'DK', 'FI',
+    'PL', 'JP', 'KR', 'IN', 'AR', 'CL', 'CO', 'PE', 'PH', 'ID', 'MY', 'SG', 'TH', 'VN', 'TR',
+    'ZA', 'NZ', 'IE', 'BE', 'AT', 'CH', 'PT', 'CZ', 'HU', 'RO', 'GR', 'IL', 'AE', 'SA', 'EG',
+    'MA', 'NG', 'KE', 'TW', 'HK', 'UA', 'SK', 'BG', 'LT', 'LV', 'EE', 'IS', 'LU', 'CR', 'PA',
+    'DO', 'GT', 'HN', 'SV', 'NI', 'PY', 'UY', 'BO', 'EC', 'VE', 'PK', 'BD'
+]
+
+def kworb_track_page(days: int = 365, countries: int = len(COUNTRIES), seed: int = 0) -> bytes:
+    """Build a kworb.net track page with a daily history table of the given length"""
+    rng = random.Random(seed)
+    codes = COUNTRIES[:countries]
+
+    header = ''.join(f'<th>{code}</th>' for code in codes)
+    totals = ''.join(f'<td>{rng.randint(10_000, 900_000_000):,}</td>' for _ in codes)
+    peaks = ''.join(f'<td>{rng.randint(1, 200)}</td>' for _ in codes)
+
+    rows = []
+    start = date(2024, 1, 1)
+    for day in range(days):
+        cells = ''.join(
+            f'<td>({rng.randint(1, 200)}) {rng.randint(1_000, 3_000_000):,}</td>' if rng.random() > 0.2 else '<td></td>'
+            for _ in codes
+        )
+        rows.append(f'<tr><td>{(start - timedelta(days=day)).strftime("%Y/%m/%d")}</td>'
+                    f'<td>{rng.randint(10_000, 9_000_000):,}</td>{cells}</tr>')
+
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Artist - Song - Spotify Chart History</title>'
+        '<link rel="stylesheet" href="../../style.css"></head><body><div class="container">'
+        '<div class="subcontainer"><span class="pagetitle"><a href="../artist/x.html">Artist</a> - Song</span>'
+        '<p>Last updated: 2024/01/01</p>'
+        '<table><thead><tr><th>Date</th><th>Global</th>' + header + '</tr></thead><tbody>'
+        '<tr><td>Total</td><td>1,234,567,890</td>' + totals + '</tr>'
+        '<tr><td>Peak</td><td>1</td>' + peaks + '</tr>'
+        + ''.join(rows) +
+        '</tbody></table></div></div></body></html>'
+    ).encode('utf-8')
+
+def mystreamcount_track_page(related: int = 20, chart_days: int = 365, seed: int = 0) -> bytes:
+    """Build a mystreamcount.com track page with related tracks and an inline chart script"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+
+    pushes = []
+    total = 0
+    for day in range(chart_days):
+        daily = rng.randint(50_000, 2_000_000)
+        total += daily
+        day_str = (start + timedelta(days=day)).isoformat()
+        pushes.append(f'total.push([new Date("{day_str}").getTime(), {total}]);')
+        pushes.append(f'daily.push([new Date("{day_str}").getTime(), {daily}]);')
+
+    tracks = []
+    for i in range(related):
+        tracks.append(
+            '<li class="flex items-center py-3 px-4">'
+            f'<img class="w-12 h-12 rounded" src="https://i.scdn.co/image/{i:040x}" alt="Album {i}">'
+            '<div class="ml-3">'
+            f'<p class="text-md font-semibold"><a href="https://www.mystreamcount.com/track/{i:022x}">Song {i}</a></p>'
+            '<p class="text-sm text-gray-500">Artist</p></div></li>'
+        )
+
+    nav = ''.join(f'<a class="px-3 py-2 text-sm text-gray-700" href="/page/{i}">Link {i}</a>' for i in range(40))
+
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Song - Artist | MyStreamCount</title>'
+        '<meta name="csrf-token" content="aBcDeFgHiJkLmNoPqRsTuVwXyZ0123456789aBcD">'
+        '<script src="https://code.jquery.com/jquery-3.6.0.min.js"></script>'
+        '<script src="https://cdn.jsdelivr.net/npm/apexcharts"></script></head>'
+        '<body class="bg-gray-100"><nav class="bg-white shadow">' + nav + '</nav>'
+        '<main class="max-w-7xl mx-auto"><div class="bg-white rounded-lg shadow p-4">'
+        '<h1 class="text-xl font-bold text-gray-900">Song</h1>'
+        '<p class="text-md text-gray-500 font-medium mt-1"><a href="https://www.mystreamcount.com/artist/0abc">Artist</a></p>'
+        '<div class="w-64 mx-auto"><a href="https://open.spotify.com/track/0phzfJn8NeT1LkbqfV2peI">'
+        '<img src="https://i.scdn.co/image/ab67616d0000b273" alt="Album"></a></div>'
+        f'<p class="text-md text-gray-900 my-4 px-4">Song by Artist has been streamed {total:,} times on Spotify '
+        'since its release on January 1, 2024.</p>'
+        '<div id="chart"></div></div>'
+        '<div class="bg-white rounded-lg shadow mt-4"><h2 class="px-4 py-3 font-bold">Other songs by Artist</h2>'
+        '<ul class="divide-y divide-gray-100">' + ''.join(tracks) + '</ul></div></main>'
+        '<script>function loadStreams() { $.ajax({ type: "POST", url: "/api/track/0phzfJn8NeT1LkbqfV2peI/streams", '
+        'data: { _token: "aBcDeFgHiJkLmNoPqRsTuVwXyZ0123456789aBcD" }, success: function (data) { createGraph(data); } }); }'
+        '</script><script>function createGraph(data) { var total = []; var daily = []; '
+        + ''.join(pushes) +
+        ' new ApexCharts(document.querySelector("#chart"), {series: [{data: total}, {data: daily}]}).render(); }</script>'
+        '</body></html>'
+    ).encode('utf-8')
+
+def mystreamcount_streams_api(chart_days: int = 365, status: str = 'ready', seed: int = 0) -> bytes:
+    """Build the JSON body of mystreamcount.com's /api/track/{id}/streams endpoint"""
+    import json
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    total_points = []
+    daily_points = []
+    total = 0
+    for day in range(chart_days):
+        timestamp = int((start + timedelta(days=day)).timestamp() * 1000)
+        daily = rng.randint(50_000, 2_000_000)
+        total += daily
+        total_points.append([timestamp, total])
+        daily_points.append([timestamp, daily])
+
+    body = {'status': status}
+    if status == 'ready':
+        body['data'] = {'total': total_points, 'daily': daily_points}
+    return json.dumps(body).encode('utf-8')
@@ -0,0 +1,106 @@
+"""
+Transport adapter that answers scraper requests from fixtures instead of the network
+
+Import after adding lambda-scraper-final to sys.path, as the benchmarks do.
+"""
+import re
+import time
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from http_cache import ConditionalHTTPAdapter, ValidatorStore
+
+Handler = Callable[..., Tuple[int, dict, bytes]]
+
+class CountingBody(BytesIO):
+    """Response body that reports how many bytes the client actually read"""
+
+    def __init__(self, body: bytes, adapter: 'ReplayAdapter'):
+        super().__init__(body)
+        self.adapter = adapter
+
+    def read(self, *args) -> bytes:
+        data = super().read(*args)
+        self.adapter.bytes_served += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        count = super().readinto(buffer)
+        self.adapter.bytes_served += count
+        return count
+
+class ReplayAdapter(HTTPAdapter):
+    def __init__(self, routes: List[Tuple[str, str, Handler]], latency: float = 0.0):
+        """
+        Args:
+            routes: (method, URL regex, handler) triples; handlers receive the prepared
+                request and the regex match and return (status, headers, body)
+            latency: Seconds slept per request to model the network round trip
+        """
+        super().__init__()
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+        self.latency = latency
+        self.requests = 0
+        # Bytes read by the client, so early-terminating readers are credited
+        self.bytes_served = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        for method, pattern, handler in self.routes:
+            match = pattern.search(request.url)
+            if method == request.method and match:
+                status, headers, body = handler(request, match)
+                break
+        else:
+            status, headers, body = 404, {'Content-Type': 'text/plain'}, b'no fixture for ' + request.url.encode()
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        self.requests += 1
+
+        raw = HTTPResponse(
+            body=CountingBody(body, self),
+            headers=headers,
+            status=status,
+            reason='OK' if status < 400 else 'Error',
+            preload_content=False,
+            decode_content=True
+        )
+        response = self.build_response(request, raw)
+        if not stream:
+            # Mirror HTTPAdapter, which reads the body unless streaming was requested
+            response.content
+        return response
+
+class ConditionalReplayAdapter(ConditionalHTTPAdapter, ReplayAdapter):
+    def __init__(self, routes: List[Tuple[str, str, Handler]], latency: float = 0.0,
+                 store: Optional[ValidatorStore] = None):
+        """
+        ConditionalHTTPAdapter whose transport is a ReplayAdapter, so conditional GETs,
+        304s and the validator store behave as they do in front of the network
+
+        Args:
+            routes: As for ReplayAdapter
+            latency: As for ReplayAdapter
+            store: Validator store, the shared validator_store by default
+        """
+        super().__init__(store=store, routes=routes, latency=latency)
+
+def mount_replay(session, routes: List[Tuple[str, str, Handler]], latency: float = 0.0) -> ReplayAdapter:
+    """
+    Answer a session's requests from routes instead of the network
+
+    A ConditionalHTTPAdapter mounted by the scraper is kept in front of the replay,
+    with the same validator store; other sessions get a plain ReplayAdapter.
+    """
+    current = session.adapters.get('https://')
+    if isinstance(current, ConditionalHTTPAdapter):
+        adapter = ConditionalReplayAdapter(routes, latency, store=current.store)
+    else:
+        adapter = ReplayAdapter(routes, latency)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
@@ -0,0 +1,24 @@
+"""
+Wall-clock timing helpers shared by the benchmarks
+"""
+import time
+from typing import Any, Callable, List, Optional
+
+def timed(fn: Callable, repeats: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """
+    Seconds taken by each of repeats runs of fn
+
+    With setup, each run calls fn with a fresh setup() result, e.g. a newly parsed
+    document, and setup itself is not timed.
+    """
+    times = []
+    for _ in range(repeats):
+        args = (setup(),) if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - started)
+    return times
+
+def best_time(fn: Callable, repeats: int, setup: Optional[Callable[[], Any]] = None) -> float:
+    """Fastest of repeats runs of fn, as timed() runs them"""
+    return min(timed(fn, repeats, setup))
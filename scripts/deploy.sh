@@ -4,11 +4,69 @@ set -e
 
 echo "🚀 Deploying Songstats Scrapers to AWS Lambda..."
 
-# Check if SAM CLI is installed
-if ! command -v sam &> /dev/null; then
-    echo "❌ AWS SAM CLI not found. Please install it first:"
-    echo "   pip install aws-sam-cli"
-    exit 1
+# Pass --bundle-only to build the deployment zip without deploying
+BUNDLE_ONLY=false
+if [ "$1" = "--bundle-only" ]; then
+    BUNDLE_ONLY=true
+fi
+
+# Get current directory
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+LAMBDA_DIR="$SCRIPT_DIR/lambda-scraper-final"
+
+# Target the Lambda runtime, not the machine running this script
+LAMBDA_PYTHON_VERSION="${LAMBDA_PYTHON_VERSION:-3.9}"
+LAMBDA_PLATFORM="${LAMBDA_PLATFORM:-manylinux2014_x86_64}"
+LXML_VERSION="${LXML_VERSION:-4.9.3}"
+
+# Function the bundle is uploaded to, and the stack whose outputs hold the API URL
+LAMBDA_FUNCTION_NAME="${LAMBDA_FUNCTION_NAME:-songstats-scrapers}"
+STACK_NAME="${STACK_NAME:-songstats-scrapers}"
+AWS_REGION="${AWS_REGION:-us-east-1}"
+
+# The bundle is assembled in a scratch copy so the working tree keeps the vendored sources
+BUILD_DIR="$(mktemp -d)"
+trap 'rm -rf "$BUILD_DIR"' EXIT
+cp -R "$LAMBDA_DIR/." "$BUILD_DIR/"
+
+# The vendored lxml/ only holds sources, so bs4 falls back to html.parser.
+# Replace it with the compiled Linux wheel so html_parsers.py can select lxml.
+echo "📦 Installing lxml $LXML_VERSION for $LAMBDA_PLATFORM / Python $LAMBDA_PYTHON_VERSION..."
+rm -rf "$BUILD_DIR/lxml" "$BUILD_DIR"/lxml-*.dist-info
+pip install \
+  --quiet \
+  --no-deps \
+  --target "$BUILD_DIR" \
+  --platform "$LAMBDA_PLATFORM" \
+  --implementation cp \
+  --python-version "$LAMBDA_PYTHON_VERSION" \
+  --only-binary=:all: \
+  "lxml==$LXML_VERSION"
+
+# Drop what the Lambda never imports: package metadata, console scripts, Cython sources
+# and C headers, CLIs, and optional backends that are only tried inside ImportError guards
+echo "✂️  Pruning unused vendored files..."
+(
+    cd "$BUILD_DIR"
+    rm -rf ./*.dist-info bin \
+        bs4/diagnose.py bs4/builder/_html5lib.py \
+        charset_normalizer/cli charset_normalizer/__main__.py \
+        certifi/__main__.py requests/help.py \
+        urllib3/contrib/emscripten urllib3/contrib/pyopenssl.py urllib3/contrib/socks.py \
+        lxml/includes
+    find . \( -name '*.pyx' -o -name '*.pxd' -o -name '*.pxi' -o -name '*.h' -o -name 'py.typed' \) -delete
+)
+
+echo "🗜️  Building lambda-deployment.zip..."
+(
+    cd "$BUILD_DIR"
+    zip -qr "$BUILD_DIR.zip" . -x '*.zip' '*__pycache__*' '*.pyc'
+)
+mv "$BUILD_DIR.zip" "$LAMBDA_DIR/lambda-deployment.zip"
+echo "✅ Bundle written to $LAMBDA_DIR/lambda-deployment.zip"
+
+if [ "$BUNDLE_ONLY" = true ]; then
+    exit 0
 fi
 
 # Check if AWS CLI is configured
@@ -17,33 +75,34 @@ if ! aws sts get-caller-identity &> /dev/null; then
     exit 1
 fi
 
-# Get current directory
-SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-cd "$SCRIPT_DIR"
-
-echo "📁 Working directory: $SCRIPT_DIR"
-
-# Build the SAM application
-echo "🔨 Building SAM application..."
-sam build --use-container
+# The script only updates code; the first deployment creates the function and its API
+if ! aws lambda get-function --function-name "$LAMBDA_FUNCTION_NAME" --region "$AWS_REGION" &> /dev/null; then
+    echo "❌ Lambda function $LAMBDA_FUNCTION_NAME not found in $AWS_REGION."
+    echo "   Create it from $LAMBDA_DIR/lambda-deployment.zip first, see AWS_LAMBDA_DEPLOYMENT.md"
+    exit 1
+fi
 
-# Deploy the application
-echo "🚀 Deploying to AWS..."
-sam deploy \
-  --guided \
-  --stack-name songstats-scrapers \
-  --region us-east-1 \
-  --capabilities CAPABILITY_IAM \
-  --parameter-overrides ParameterKey=Environment,ParameterValue=prod
+# Upload the bundle built above, so the compiled lxml is what the function runs
+echo "🚀 Updating Lambda function $LAMBDA_FUNCTION_NAME..."
+aws lambda update-function-code \
+  --function-name "$LAMBDA_FUNCTION_NAME" \
+  --zip-file "fileb://$LAMBDA_DIR/lambda-deployment.zip" \
+  --region "$AWS_REGION" \
+  --output text \
+  --query 'LastModified'
+aws lambda wait function-updated \
+  --function-name "$LAMBDA_FUNCTION_NAME" \
+  --region "$AWS_REGION"
 
 # Get the API endpoint
 echo "✅ Deployment complete!"
 echo ""
 echo "📡 Getting API endpoint URL..."
 API_URL=$(aws cloudformation describe-stacks \
-  --stack-name songstats-scrapers \
+  --stack-name "$STACK_NAME" \
+  --region "$AWS_REGION" \
   --query 'Stacks[0].Outputs[?OutputKey==`ScraperApiUrl`].OutputValue' \
-  --output text)
+  --output text 2> /dev/null || true)
 
 if [ -n "$API_URL" ]; then
     echo "🎉 Your API is deployed at: $API_URL"
@@ -65,11 +124,11 @@ if [ -n "$API_URL" ]; then
         echo "⚠️  Health check failed - API might still be warming up"
     fi
 else
-    echo "❌ Could not retrieve API URL from CloudFormation stack"
+    echo "❌ Could not retrieve API URL from CloudFormation stack $STACK_NAME"
 fi
 
 echo ""
 echo "📋 Next steps:"
 echo "1. Update your Vercel environment variable SCRAPER_API_URL"
 echo "2. Test the endpoints above"
-echo "3. Monitor logs: sam logs -n songstats-scrapers --tail" 
\ No newline at end of file
+echo "3. Monitor logs: aws logs tail /aws/lambda/$LAMBDA_FUNCTION_NAME --follow --region $AWS_REGION" 
\ No newline at end of file
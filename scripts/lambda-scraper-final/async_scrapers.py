@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from weakref import WeakKeyDictionary
+
+from lambda_function import ACTION_SCRAPERS, KWORB_BATCH_WORKERS, MAX_BATCH_WORKERS, run_track_action
+
+# Calls in flight per upstream, by scraper name; each scraper talks to one host.
+# Requests are still paced per host by the scrapers' rate limiters.
+HOST_CONCURRENCY = {
+    'mystreamcount': MAX_BATCH_WORKERS,
+    'kworb': KWORB_BATCH_WORKERS
+}
+
+# The loop's default executor has min(32, CPUs + 4) threads, fewer than the semaphores
+# allow on a small Lambda, so the scrapers get threads of their own
+executor = ThreadPoolExecutor(max_workers=sum(HOST_CONCURRENCY.values()), thread_name_prefix='async-scraper')
+
+# asyncio semaphores belong to the event loop they are used on, so each loop gets its own
+_semaphores: 'WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+def host_semaphore(name: str) -> asyncio.Semaphore:
+    """The running loop's semaphore bounding concurrent calls to the scraper's host"""
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphores = _semaphores.setdefault(loop, {})
+        if name not in semaphores:
+            semaphores[name] = asyncio.Semaphore(HOST_CONCURRENCY[name])
+        return semaphores[name]
+
+async def run_track_action_async(action: str, track_id: str, **options) -> Dict[str, Any]:
+    """
+    Run a per-track action on a worker thread, behind its host's semaphore
+
+    The blocking scrapers run unchanged on executor's threads: calls still go
+    through the warm scraper pool, its health reporting and the per-host rate limiters,
+    and the event loop stays free while they wait on the network. Results are not
+    cached; the handler's actions add the result cache on top.
+
+    Args:
+        action: One of lambda_function.BATCH_ACTIONS
+        track_id: Spotify track ID
+        **options: Polling options passed to get_chart_data_only (deadline, wait, attempt)
+
+    Returns:
+        The scraper result for the track
+    """
+    if action not in ACTION_SCRAPERS:
+        raise ValueError(f'Unsupported action: {action}')
+
+    # As asyncio.to_thread does, but on executor and keeping the caller's context
+    call = functools.partial(contextvars.copy_context().run, run_track_action, action, track_id, **options)
+    async with host_semaphore(ACTION_SCRAPERS[action]):
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+async def get_top_streaming_country(track_id: str) -> Dict[str, Any]:
+    """Async KworbScraper.get_top_streaming_country"""
+    return await run_track_action_async('kworb', track_id)
+
+async def scrape_track(track_id: str) -> Dict[str, Any]:
+    """Async MyStreamCountJSONScraper.scrape_track"""
+    return await run_track_action_async('stream_count', track_id)
+
+async def get_chart_data_only(track_id: str, **options) -> Dict[str, Any]:
+    """Async MyStreamCountJSONScraper.get_chart_data_only; options as for the blocking call"""
+    return await run_track_action_async('chart_data', track_id, **options)
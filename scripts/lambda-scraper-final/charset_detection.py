@@ -0,0 +1,149 @@
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from charset_normalizer import from_bytes
+from charset_normalizer.utils import is_multi_byte_encoding
+
+# Candidates tried in order by the early-exit mode, most likely for our upstreams first.
+# UTF-8 is not listed: decode_markup has already tried it strictly. Single-byte Latin
+# code pages read each other's text cleanly, so only the most common one is listed.
+CANDIDATE_ENCODINGS = ('cp1252', 'cp1251', 'cp932', 'cp949', 'gb18030', 'big5', 'iso8859_7')
+
+# A candidate wins outright when its sample reads with at most this mess ratio and at
+# least this language coherence (both 0..1, as reported by charset_normalizer). Short
+# CJK samples score little coherence, but a strict multi-byte decode is evidence enough.
+ACCEPT_CHAOS = 0.02
+ACCEPT_COHERENCE = 0.2
+
+# Detection only reads the text around non-ASCII runs, up to this many bytes in total
+SAMPLE_BYTES = 16384
+WINDOW_BYTES = 1024
+
+NON_ASCII_PATTERN = re.compile(rb'[\x80-\xff]+')
+# Bytes no supported encoding uses inside a multi-byte character
+SPACE_PATTERN = re.compile(rb'\s')
+
+def _window(content: bytes, start: int, end: int, low: int, high: int) -> Tuple[int, int]:
+    """
+    Widen [start, end) to the text node around it within [low, high)
+
+    Cuts are made only at angle brackets or whitespace, which no supported encoding
+    uses inside a multi-byte character.
+    """
+    tag_end = content.rfind(b'>', low, start)
+    if tag_end != -1:
+        start = tag_end + 1
+    else:
+        space = SPACE_PATTERN.search(content, low, start)
+        start = space.end() if space else start
+
+    tag_start = content.find(b'<', end, high)
+    if tag_start != -1:
+        end = tag_start
+    else:
+        end = max(end, *(content.rfind(space, end, high) for space in (b' ', b'\n')))
+    return start, end
+
+def sample_non_ascii(content: bytes, max_bytes: int = SAMPLE_BYTES, window: int = WINDOW_BYTES) -> bytes:
+    """
+    Concatenate the text around non-ASCII runs, leaving out the markup between them
+
+    Each run is widened to its text node, by at most half of window on each side, so
+    every piece decodes the same way the whole page does and keeps its words whole.
+    """
+    pieces = []
+    size = 0
+    position = 0
+    for run in NON_ASCII_PATTERN.finditer(content):
+        if run.start() < position:
+            continue
+        start, end = _window(content, run.start(), run.end(),
+                             max(position, run.start() - window // 2), run.end() + window // 2)
+        pieces.append(content[start:end])
+        size += end - start
+        position = end
+        if size >= max_bytes:
+            break
+    return b'\n'.join(pieces)
+
+class EncodingMemo:
+    def __init__(self):
+        """Remember the encoding that last decoded a page from each host"""
+        self._encodings: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: Optional[str]) -> Optional[str]:
+        if not host:
+            return None
+        with self._lock:
+            return self._encodings.get(host)
+
+    def set(self, host: Optional[str], encoding: str) -> None:
+        if host:
+            with self._lock:
+                self._encodings[host] = encoding
+
+    def stats(self) -> Dict[str, str]:
+        """Remembered encoding per host, for the health endpoint"""
+        with self._lock:
+            return dict(self._encodings)
+
+# Module scope so warm Lambda containers keep what they learned
+encoding_memo = EncodingMemo()
+
+def _decodes(content: bytes, encoding: str) -> bool:
+    try:
+        content.decode(encoding)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _rate(sample: bytes, encoding: str) -> Optional[Tuple[float, float]]:
+    """(mess ratio, language coherence) of the sample read with encoding, None when it does not decode"""
+    if not _decodes(sample, encoding):
+        return None
+    best = from_bytes(sample, cp_isolation=[encoding], preemptive_behaviour=False).best()
+    return (best.chaos, best.coherence) if best is not None else None
+
+def _confident(encoding: str, chaos: float, coherence: float) -> bool:
+    return chaos <= ACCEPT_CHAOS and (coherence >= ACCEPT_COHERENCE or is_multi_byte_encoding(encoding))
+
+def detect_encoding(content: bytes) -> Tuple[Optional[str], str]:
+    """
+    Bounded, early-exit replacement for running charset_normalizer over a whole page
+
+    Candidates are rated one at a time against a sample of the page's non-ASCII text
+    and the first that reads confidently wins, instead of every code page being decoded
+    and mess-scored across the full body. Otherwise the least messy candidate that
+    decoded wins, and only when none did does charset_normalizer rank all code pages,
+    still on the sample only.
+
+    A page with only a word or two of non-ASCII text gives any detector little to go
+    on; decode_markup's per-host memo carries over the encoding of richer pages.
+
+    Args:
+        content: Raw page that is not valid UTF-8
+
+    Returns:
+        Tuple of the encoding (None when nothing decodes the whole page) and how it was
+        found: 'early', 'candidates' or 'ranked'
+    """
+    sample = sample_non_ascii(content)
+
+    rated = []
+    for priority, encoding in enumerate(CANDIDATE_ENCODINGS):
+        rating = _rate(sample, encoding)
+        if rating is None or not _decodes(content, encoding):
+            continue
+        if _confident(encoding, *rating):
+            return encoding, 'early'
+        rated.append((rating[0], -rating[1], priority, encoding))
+
+    if rated:
+        return min(rated)[3], 'candidates'
+
+    best = from_bytes(sample).best()
+    if best is not None and _decodes(content, best.encoding):
+        return best.encoding, 'ranked'
+    return None, 'ranked'
@@ -1,21 +1,131 @@
 import requests
 from bs4 import BeautifulSoup
 import json
-import re
-from datetime import datetime
+import os
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import time
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set
+from urllib.parse import urlparse
+from extraction_specs import (
+    RELATED_TRACKS_PLAN, TRACK_ID_PATTERN, TRACK_INFO_FIELDS, TRACK_INFO_PLAN, TRACK_PAGE_PLAN
+)
+from html_parsers import HTML_PARSER, make_soup
+from http_cache import ConditionalHTTPAdapter, is_transport_error
+from page_scripts import PageScripts, analyze_scripts
+from parsed_cache import parsed_cache
+from rate_limiter import HostRateLimiter
+
+# Laravel keeps sessions for two hours by default; refresh well before that
+CSRF_TOKEN_TTL = 1800
+
+class CsrfTokenCache:
+    def __init__(self, ttl: float = CSRF_TOKEN_TTL):
+        """
+        Cache CSRF tokens and the session cookies they belong to, keyed by host
+        
+        Args:
+            ttl: Seconds a token is reused before the track page is fetched again
+        """
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    def host_lock(self, host: str) -> threading.Lock:
+        """Lock held while fetching a token so concurrent callers share one page fetch"""
+        with self._lock:
+            return self._host_locks.setdefault(host, threading.Lock())
+    
+    def get(self, host: str) -> Optional[Dict]:
+        """Return the cached entry for a host if it has not expired"""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry and time.monotonic() - entry['fetched_at'] < self.ttl:
+                return entry
+            self._entries.pop(host, None)
+            return None
+    
+    def set(self, host: str, token: str, cookies: List[Dict]) -> None:
+        with self._lock:
+            self._entries[host] = {
+                'token': token,
+                'cookies': cookies,
+                'fetched_at': time.monotonic()
+            }
+    
+    def invalidate(self, host: str) -> None:
+        with self._lock:
+            self._entries.pop(host, None)
+
+# Module scope so warm Lambda containers keep tokens across invocations
+csrf_token_cache = CsrfTokenCache()
+
+# Backoff between polls of the streams API while it is still processing a track
+POLL_BASE_DELAY = 1.0
+POLL_MAX_DELAY = 8.0
+# Longest Retry-After slept on; a longer one ends polling and is passed back to the caller
+POLL_MAX_RETRY_AFTER = 30.0
+
+# Statuses worth polling again, usually sent with a Retry-After header
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+def poll_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter for the given zero-based poll attempt
+    
+    Half of the delay is fixed and half is random, so concurrent pollers spread out
+    without ever retrying immediately.
+    """
+    delay = min(POLL_MAX_DELAY, POLL_BASE_DELAY * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 class MyStreamCountJSONScraper:
-    def __init__(self, delay: float = 1.0):
+    def __init__(self, delay: float = 1.0, max_workers: int = 4):
         """
         Initialize the JSON scraper for MyStreamCount
         
         Args:
-            delay: Delay between requests in seconds
+            delay: Minimum average interval between requests to the same host in seconds
+            max_workers: Number of tracks scraped concurrently by scrape_multiple_tracks
         """
         self.delay = delay
+        self.max_workers = max_workers
+        # Burst of two so a track's page GET and API POST are not spaced apart
+        self.rate_limiter = HostRateLimiter(rate=1.0 / delay if delay > 0 else None, capacity=2)
+        self.last_batch_stats: Dict = {}
+        self.html_parser = HTML_PARSER
+        self.parsed_cache = parsed_cache
         self.session = requests.Session()
+        # Hosts this session has fetched a page from, so the site has started its session
+        self._session_hosts = set()
+        # One pooled connection per worker so concurrent tracks keep their keep-alive sockets;
+        # track pages are revalidated with ETag / Last-Modified instead of re-downloaded
+        adapter = ConditionalHTTPAdapter(pool_maxsize=max(max_workers, 1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -25,9 +135,60 @@ class MyStreamCountJSONScraper:
             'Upgrade-Insecure-Requests': '1'
         })
     
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Issue a request once the per-host rate limiter allows it"""
+        self.rate_limiter.wait(url)
+        return self.session.request(method, url, **kwargs)
+    
+    def _find_csrf_token(self, soup: BeautifulSoup, scripts: Optional[PageScripts] = None) -> Optional[str]:
+        """Extract the CSRF token the page passes to its streams API call"""
+        return (scripts or analyze_scripts(soup)).csrf_token
+    
+    def _remember_csrf_token(self, url: str, token: str) -> None:
+        """Store a token with the session cookies it is bound to"""
+        host = urlparse(url).netloc
+        cookies = [
+            {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+            for cookie in self.session.cookies
+            if host.endswith(cookie.domain.lstrip('.'))
+        ]
+        csrf_token_cache.set(host, token, cookies)
+    
+    def _get_csrf_token(self, track_id: str, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Get a CSRF token from the cache, fetching the track page only on a miss
+        
+        Args:
+            track_id: Spotify track ID whose page is fetched on a miss
+            stale_token: Token the API rejected; a cached entry holding it is not reused
+            
+        Returns:
+            CSRF token, or None if the page does not contain one
+        """
+        url = f"https://www.mystreamcount.com/track/{track_id}"
+        host = urlparse(url).netloc
+        
+        with csrf_token_cache.host_lock(host):
+            entry = csrf_token_cache.get(host)
+            if entry and entry['token'] != stale_token:
+                for cookie in entry['cookies']:
+                    self.session.cookies.set(cookie['name'], cookie['value'],
+                                             domain=cookie['domain'], path=cookie['path'])
+                return entry['token']
+            
+            csrf_token_cache.invalidate(host)
+            # A stored page holds a token bound to whichever session fetched it first
+            response = self._request('GET', url, headers={'Cache-Control': 'no-cache'}, timeout=30)
+            soup = make_soup(response.content, self.html_parser, response.headers.get('Content-Type'), host)
+            
+            csrf_token = self._find_csrf_token(soup)
+            if csrf_token:
+                self._remember_csrf_token(url, csrf_token)
+            return csrf_token
+    
     def extract_track_id_from_url(self, url: str) -> Optional[str]:
         """Extract track ID from MyStreamCount URL"""
-        match = re.search(r'/track/([a-zA-Z0-9]+)', url)
+        match = TRACK_ID_PATTERN.search(url)
         return match.group(1) if match else None
     
     def scrape_track(self, track_id: str) -> Dict:
@@ -43,20 +204,39 @@ class MyStreamCountJSONScraper:
         url = f"https://www.mystreamcount.com/track/{track_id}"
         
         try:
-            response = self.session.get(url, timeout=30)
+            host = urlparse(url).netloc
+            if host in self._session_hosts:
+                response = self._request('GET', url, timeout=30)
+            else:
+                # Concurrent cold GETs would each start their own Laravel session, binding
+                # their tokens to cookies the shared session keeps for only one of them
+                with csrf_token_cache.host_lock(host):
+                    response = self._request('GET', url, timeout=30)
+                    self._session_hosts.add(host)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # An unchanged page reuses the previous extraction without being parsed
+            content = response.content
+            content_type = response.headers.get('Content-Type')
+            page = self.parsed_cache.get_or_extract(
+                'mystreamcount:track', content, lambda: self._extract_page(content, content_type, host)
+            )
+            
+            # A page answered from the validator store carries the token of an earlier
+            # session, possibly of a recycled scraper; use one fetched for this session
+            csrf_token = page['csrf_token']
+            if getattr(response, 'from_validator_cache', False):
+                csrf_token = self._get_csrf_token(track_id)
             
             # Extract basic track info
             track_data = {
                 'track_id': track_id,
                 'url': url,
                 'scraped_at': datetime.now().isoformat(),
-                'track_info': self._extract_track_info(soup),
-                'streaming_data': self._extract_streaming_data(soup),
-                'chart_data': self._extract_chart_data_from_api(soup, track_id),
-                'related_tracks': self._extract_related_tracks(soup)
+                'track_info': page['track_info'],
+                'streaming_data': page['streaming_data'],
+                'chart_data': self._fetch_chart_data(csrf_token, track_id),
+                'related_tracks': page['related_tracks']
             }
             
             return track_data
@@ -67,113 +247,72 @@ class MyStreamCountJSONScraper:
                 'url': url,
                 'scraped_at': datetime.now().isoformat(),
                 'error': str(e),
-                'success': False
+                'success': False,
+                'transport_error': is_transport_error(e)
             }
-        
-        finally:
-            time.sleep(self.delay)
+    
+    def _extract_page(self, content: bytes, content_type: Optional[str] = None, host: Optional[str] = None) -> Dict:
+        """Everything scrape_track derives from the track page itself"""
+        soup = make_soup(content, self.html_parser, content_type, host)
+        # One walk fills track info and related tracks; inline scripts are scanned once and
+        # shared by the streaming data and token lookups
+        page = TRACK_PAGE_PLAN.run(soup)
+        scripts = analyze_scripts(soup)
+        return {
+            'track_info': {field.name: page[field.name] for field in TRACK_INFO_FIELDS if field.name in page},
+            'streaming_data': self._extract_streaming_data(soup, scripts),
+            'related_tracks': page['related_tracks'],
+            'csrf_token': self._find_csrf_token(soup, scripts)
+        }
     
     def _extract_track_info(self, soup: BeautifulSoup) -> Dict:
         """Extract basic track information"""
-        track_info = {}
-        
-        # Extract title
-        title_elem = soup.select_one('h1.text-xl.font-bold.text-gray-900')
-        if title_elem:
-            track_info['title'] = title_elem.get_text().strip()
-        
-        # Extract artist
-        artist_elem = soup.select_one('p.text-md.text-gray-500.font-medium.mt-1 a')
-        if artist_elem:
-            track_info['artist'] = artist_elem.get_text().strip()
-            track_info['artist_url'] = artist_elem.get('href', '')
-        
-        # Extract album artwork
-        artwork_elem = soup.select_one('div.w-64.mx-auto img')
-        if artwork_elem:
-            track_info['artwork_url'] = artwork_elem.get('src', '')
-            track_info['album_name'] = artwork_elem.get('alt', '')
-        
-        # Extract Spotify URL
-        spotify_link = soup.select_one('div.w-64.mx-auto a')
-        if spotify_link:
-            track_info['spotify_url'] = spotify_link.get('href', '')
-        
-        # Extract total streams from description text
-        streams_text = soup.select_one('p.text-md.text-gray-900.my-4.px-4')
-        if streams_text:
-            text = streams_text.get_text()
-            # Look for the pattern with total streams
-            streams_match = re.search(r'(\d{1,3}(?:,\d{3})*)\s*times on Spotify', text)
-            if streams_match:
-                track_info['total_streams'] = int(streams_match.group(1).replace(',', ''))
-                track_info['streams_text'] = text.strip()
-        
-        # Extract release date if mentioned
-        release_match = re.search(r'since its release on (.+?)\.', streams_text.get_text() if streams_text else '')
-        if release_match:
-            track_info['release_date'] = release_match.group(1)
-        
-        return track_info
-    
-    def _extract_streaming_data(self, soup: BeautifulSoup) -> Dict:
+        # Title, artist, artwork, Spotify URL and the total streams sentence; see TRACK_INFO_FIELDS
+        return TRACK_INFO_PLAN.run(soup)
+    
+    def _extract_streaming_data(self, soup: BeautifulSoup, scripts: Optional[PageScripts] = None) -> Dict:
         """Extract streaming data from JavaScript"""
-        streaming_data = {}
-        
-        # Look for the loadStreams function and API endpoint
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string and 'loadStreams' in script.string:
-                # Extract API URL
-                api_match = re.search(r'url:\s*["\']([^"\']+)["\']', script.string)
-                if api_match:
-                    streaming_data['api_url'] = api_match.group(1)
-                
-                # Extract CSRF token
-                token_match = re.search(r'_token:\s*["\']([^"\']+)["\']', script.string)
-                if token_match:
-                    streaming_data['csrf_token'] = token_match.group(1)
-        
-        # Look for chart creation function
-        for script in scripts:
-            if script.string and 'createGraph' in script.string:
-                # Try to extract any hardcoded data
-                data_matches = re.findall(r'total\.push\(\[new Date\([^)]+\)\.getTime\(\), ([^\]]+)\]\)', script.string)
-                if data_matches:
-                    streaming_data['sample_total_data'] = data_matches
-                
-                daily_matches = re.findall(r'daily\.push\(\[new Date\([^)]+\)\.getTime\(\), ([^\]]+)\]\)', script.string)
-                if daily_matches:
-                    streaming_data['sample_daily_data'] = daily_matches
-        
-        return streaming_data
+        # API endpoint and CSRF token from loadStreams, hardcoded series from createGraph
+        return (scripts or analyze_scripts(soup)).streaming_data()
     
     def _extract_chart_data_from_api(self, soup: BeautifulSoup, track_id: str) -> Optional[Dict]:
         """
         Attempt to get chart data from the API endpoint
         """
+        return self._fetch_chart_data(self._find_csrf_token(soup), track_id)
+    
+    def _fetch_chart_data(self, csrf_token: Optional[str], track_id: str) -> Optional[Dict]:
+        """
+        Request chart data with the CSRF token found on the track page
+        """
         try:
-            # Extract CSRF token from the page
-            csrf_token = None
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string and '_token:' in script.string:
-                    token_match = re.search(r'_token:\s*["\']([^"\']+)["\']', script.string)
-                    if token_match:
-                        csrf_token = token_match.group(1)
-                        break
-            
+            # Share the page's token with chart polling
             if not csrf_token:
                 return {'error': 'CSRF token not found'}
             
-            # Make API request
             api_url = f"https://www.mystreamcount.com/api/track/{track_id}/streams"
-            api_response = self.session.post(
+            self._remember_csrf_token(api_url, csrf_token)
+            
+            # Make API request
+            api_response = self._request(
+                'POST',
                 api_url,
                 data={'_token': csrf_token},
                 timeout=30
             )
             
+            # 419 is Laravel's CSRF mismatch; retry once with a token for this session
+            if api_response.status_code == 419:
+                csrf_token = self._get_csrf_token(track_id, stale_token=csrf_token)
+                if not csrf_token:
+                    return {'error': 'CSRF token not found'}
+                api_response = self._request(
+                    'POST',
+                    api_url,
+                    data={'_token': csrf_token},
+                    timeout=30
+                )
+            
             if api_response.status_code == 200:
                 api_data = api_response.json()
                 return {
@@ -192,59 +331,79 @@ class MyStreamCountJSONScraper:
     
     def _extract_related_tracks(self, soup: BeautifulSoup) -> List[Dict]:
         """Extract related tracks from the same artist"""
-        related_tracks = []
+        # One record per entry of the "Other songs" list; see RELATED_TRACKS_RECORD
+        return RELATED_TRACKS_PLAN.run(soup)['related_tracks']
+    
+    def iter_scrape_tracks(self, track_ids: List[str], max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Scrape tracks concurrently, yielding each result as soon as it completes
         
-        # Find the "Other songs" section
-        tracks_section = soup.select('ul.divide-y.divide-gray-100 li')
+        Requests are paced by the per-host rate limiter rather than a fixed sleep,
+        so wall clock time is bounded by the rate limit instead of latency plus delay.
+        Only a couple of tracks per worker are in flight at once, keeping memory flat
+        for very large batches.
         
-        for track_item in tracks_section:
-            track_data = {}
+        Args:
+            track_ids: List of Spotify track IDs
+            max_workers: Overrides the worker count given to the constructor
             
-            # Extract track image
-            img_elem = track_item.select_one('img')
-            if img_elem:
-                track_data['artwork_url'] = img_elem.get('src', '')
-                track_data['album_name'] = img_elem.get('alt', '')
+        Yields:
+            Dictionaries containing track data, tagged with their batch_index
+        """
+        workers = max(1, max_workers or self.max_workers)
+        total = len(track_ids)
+        started = time.monotonic()
+        completed = 0
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            queue = iter(enumerate(track_ids))
             
-            # Extract track title and URL
-            title_link = track_item.select_one('p.text-md.font-semibold a')
-            if title_link:
-                track_data['title'] = title_link.get_text().strip()
-                track_data['url'] = title_link.get('href', '')
-                # Extract track ID from URL
-                track_id_match = re.search(r'/track/([a-zA-Z0-9]+)', track_data['url'])
-                if track_id_match:
-                    track_data['track_id'] = track_id_match.group(1)
+            def submit_next() -> bool:
+                item = next(queue, None)
+                if item is None:
+                    return False
+                i, track_id = item
+                pending[executor.submit(self.scrape_track, track_id)] = i
+                return True
             
-            # Extract artist
-            artist_elem = track_item.select_one('p.text-sm.text-gray-500')
-            if artist_elem:
-                track_data['artist'] = artist_elem.get_text().strip()
+            for _ in range(workers * 2):
+                if not submit_next():
+                    break
             
-            if track_data:  # Only add if we found some data
-                related_tracks.append(track_data)
-        
-        return related_tracks
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    track_data = future.result()
+                    track_data['batch_index'] = pending.pop(future)
+                    completed += 1
+                    print(f"Scraped track {completed}/{total}: {track_data['track_id']}", file=sys.stderr)
+                    submit_next()
+                    yield track_data
+        
+        elapsed = time.monotonic() - started
+        self.last_batch_stats = {
+            'tracks': completed,
+            'workers': workers,
+            'elapsed_seconds': round(elapsed, 3),
+            'tracks_per_second': round(completed / elapsed, 3) if elapsed > 0 else None
+        }
+        print(f"Scraped {completed} tracks in {elapsed:.1f}s "
+              f"({self.last_batch_stats['tracks_per_second']} tracks/s, {workers} workers)", file=sys.stderr)
     
-    def scrape_multiple_tracks(self, track_ids: List[str]) -> List[Dict]:
+    def scrape_multiple_tracks(self, track_ids: List[str], max_workers: Optional[int] = None) -> List[Dict]:
         """
-        Scrape multiple tracks and return list of JSON objects
+        Scrape multiple tracks concurrently and return list of JSON objects
         
         Args:
             track_ids: List of Spotify track IDs
+            max_workers: Overrides the worker count given to the constructor
             
         Returns:
-            List of dictionaries containing track data
+            List of dictionaries containing track data, ordered by batch_index
         """
-        results = []
-        
-        for i, track_id in enumerate(track_ids):
-            print(f"Scraping track {i+1}/{len(track_ids)}: {track_id}")
-            
-            track_data = self.scrape_track(track_id)
-            track_data['batch_index'] = i
-            results.append(track_data)
-        
+        results = list(self.iter_scrape_tracks(track_ids, max_workers))
+        results.sort(key=lambda track_data: track_data['batch_index'])
         return results
     
     def scrape_from_urls(self, urls: List[str]) -> List[Dict]:
@@ -289,46 +448,72 @@ class MyStreamCountJSONScraper:
         print(f"Data saved to {filename}")
         return filename
     
-    def get_chart_data_only(self, track_id: str, max_retries: int = 3) -> Dict:
+    def get_chart_data_only(self, track_id: str, max_retries: int = 3, deadline: Optional[float] = None,
+                            wait: bool = True, attempt: int = 0) -> Dict:
         """
         Get only the chart data for a track by polling the API
         
+        While the API reports the track as processing, polls are spaced with exponential
+        backoff and jitter, or by the server's Retry-After header when it sends one. A
+        poll that would not finish before the deadline, or that Retry-After puts more
+        than POLL_MAX_RETRY_AFTER seconds away, is skipped and the track is reported as
+        still processing, so callers can come back later instead of idling.
+        
         Args:
             track_id: Spotify track ID
             max_retries: Maximum number of API polling attempts
+            deadline: time.monotonic() value by which polling must stop
+            wait: Poll again while processing; when False return after the first poll
+            attempt: Polls already made by an earlier call, used to continue the backoff
             
         Returns:
-            Dictionary with chart data
+            Dictionary with chart data, or status 'processing' and the suggested
+            retry_after in seconds when the data is not ready yet
         """
-        # First get the page to extract CSRF token
-        url = f"https://www.mystreamcount.com/track/{track_id}"
-        response = self.session.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract CSRF token
-        csrf_token = None
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string and '_token:' in script.string:
-                token_match = re.search(r'_token:\s*["\']([^"\']+)["\']', script.string)
-                if token_match:
-                    csrf_token = token_match.group(1)
-                    break
+        # The track page is only fetched when no cached CSRF token is available
+        csrf_token = self._get_csrf_token(track_id)
         
         if not csrf_token:
             return {'error': 'CSRF token not found'}
         
         # Poll the API
         api_url = f"https://www.mystreamcount.com/api/track/{track_id}/streams"
-        
-        for attempt in range(max_retries):
+        token_refreshed = False
+        polls = 0
+        
+        while True:
+            retry_after = None
+            failure = None
+            # A slow POST must not outlast the deadline the backoff respects
+            timeout = 30.0
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    return {
+                        'track_id': track_id,
+                        'status': 'processing',
+                        'attempt': attempt + polls,
+                        'retry_after': round(poll_delay(attempt + polls), 1)
+                    }
             try:
-                api_response = self.session.post(
+                api_response = self._request(
+                    'POST',
                     api_url,
                     data={'_token': csrf_token},
-                    timeout=30
+                    timeout=timeout
                 )
                 
+                # 419 is Laravel's CSRF mismatch; the cached token's session has expired
+                if api_response.status_code == 419 and not token_refreshed:
+                    token_refreshed = True
+                    csrf_token = self._get_csrf_token(track_id, stale_token=csrf_token)
+                    if not csrf_token:
+                        return {'error': 'CSRF token not found'}
+                    continue
+                
+                polls += 1
+                retry_after = parse_retry_after(api_response.headers.get('Retry-After'))
+                
                 if api_response.status_code == 200:
                     api_data = api_response.json()
                     
@@ -340,9 +525,7 @@ class MyStreamCountJSONScraper:
                             'retrieved_at': datetime.now().isoformat()
                         }
                     elif api_data.get('status') == 'processing':
-                        print(f"Data processing, attempt {attempt + 1}/{max_retries}...")
-                        time.sleep(3)  # Wait before retry
-                        continue
+                        print(f"Data processing, attempt {attempt + polls}...", file=sys.stderr)
                     else:
                         return {
                             'track_id': track_id,
@@ -351,54 +534,203 @@ class MyStreamCountJSONScraper:
                             'api_response': api_data
                         }
                 else:
-                    return {
+                    failure = {
                         'track_id': track_id,
                         'status': 'error',
                         'error': f'HTTP {api_response.status_code}',
-                        'status_code': api_response.status_code
+                        'status_code': api_response.status_code,
+                        'transport_error': api_response.status_code >= 500
                     }
+                    if api_response.status_code not in RETRYABLE_STATUS_CODES:
+                        return failure
                     
             except Exception as e:
-                if attempt == max_retries - 1:  # Last attempt
-                    return {
-                        'track_id': track_id,
-                        'status': 'error',
-                        'error': str(e)
-                    }
-                else:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    time.sleep(2)
+                polls += 1
+                failure = {
+                    'track_id': track_id,
+                    'status': 'error',
+                    'error': str(e),
+                    'transport_error': is_transport_error(e)
+                }
+                print(f"Attempt {attempt + polls} failed: {e}", file=sys.stderr)
+            
+            delay = retry_after if retry_after is not None else poll_delay(attempt + polls - 1)
+            if (not wait or polls >= max_retries or delay > POLL_MAX_RETRY_AFTER
+                    or (deadline is not None and time.monotonic() + delay > deadline)):
+                if failure:
+                    return failure
+                # Still processing; let the caller decide when to come back
+                return {
+                    'track_id': track_id,
+                    'status': 'processing',
+                    'attempt': attempt + polls,
+                    'retry_after': round(delay, 1)
+                }
+            time.sleep(delay)
+
+class NDJSONWriter:
+    def __init__(self, filename: Optional[str] = None):
+        """
+        Append one JSON record per line, flushing after every record
         
-        return {
-            'track_id': track_id,
-            'status': 'error',
-            'error': 'Max retries exceeded'
-        }
+        Args:
+            filename: File to append to, stdout when not provided
+        """
+        self.filename = filename
+        self._file = None
+    
+    def __enter__(self) -> 'NDJSONWriter':
+        if self.filename is None:
+            self._file = sys.stdout
+            return self
+        
+        # A crash can leave a half-written last line; start on a fresh one
+        needs_newline = False
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            with open(self.filename, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        
+        self._file = open(self.filename, 'a', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+        self._file = None
+    
+    def write(self, record: Dict) -> None:
+        """Write a record as a single line and flush it to disk"""
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+
+def load_completed_track_ids(filename: str) -> Set[str]:
+    """
+    Collect track IDs that already have a successful record in an NDJSON file
+    
+    Failed records and a truncated last line are ignored so those tracks are retried.
+    """
+    completed = set()
+    if not os.path.exists(filename):
+        return completed
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get('track_id') and record.get('success') is not False:
+                completed.add(record['track_id'])
+    
+    return completed
+
+def read_track_ids_file(filename: str, scraper: MyStreamCountJSONScraper) -> List[str]:
+    """Read track IDs or track URLs, one per line, skipping blanks, comments and duplicates"""
+    track_ids = []
+    seen = set()
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith('#'):
+                continue
+            
+            track_id = scraper.extract_track_id_from_url(entry) if '/' in entry else entry
+            if not track_id:
+                print(f"Warning: Could not extract track ID from URL: {entry}", file=sys.stderr)
+                continue
+            
+            if track_id not in seen:
+                seen.add(track_id)
+                track_ids.append(track_id)
+    
+    return track_ids
+
+def scrape_to_ndjson(scraper: MyStreamCountJSONScraper, track_ids: List[str], output_file: Optional[str] = None,
+                     resume: bool = False) -> Dict:
+    """
+    Scrape tracks and stream each record to NDJSON as soon as it completes
+    
+    Args:
+        scraper: Scraper to use
+        track_ids: Spotify track IDs
+        output_file: NDJSON file to append to, stdout when not provided
+        resume: Skip track IDs that already have a successful record in output_file
+        
+    Returns:
+        Summary of the run
+    """
+    skipped = 0
+    if resume and output_file:
+        completed = load_completed_track_ids(output_file)
+        remaining = [track_id for track_id in track_ids if track_id not in completed]
+        skipped = len(track_ids) - len(remaining)
+        track_ids = remaining
+    
+    succeeded = failed = 0
+    with NDJSONWriter(output_file) as writer:
+        for track_data in scraper.iter_scrape_tracks(track_ids):
+            track_data.setdefault('success', True)
+            if track_data['success']:
+                succeeded += 1
+            else:
+                failed += 1
+            writer.write(track_data)
+    
+    return {
+        'success': True,
+        'output_file': output_file,
+        'scraped': succeeded + failed,
+        'succeeded': succeeded,
+        'failed': failed,
+        'skipped': skipped,
+        'stats': scraper.last_batch_stats
+    }
 
 # Command line interface
 def main():
     """Main function to handle command line arguments"""
     import argparse
-    import sys
     
     parser = argparse.ArgumentParser(description='Scrape MyStreamCount data for tracks')
     parser.add_argument('--track-id', help='Spotify track ID to scrape')
     parser.add_argument('--track-url', help='MyStreamCount URL to scrape')
+    parser.add_argument('--input-file', help='File with one track ID or URL per line, scraped to NDJSON')
     parser.add_argument('--output-file', help='Output file to save results (optional)')
+    parser.add_argument('--resume', action='store_true',
+                        help='With --input-file, skip tracks already saved successfully in --output-file')
     parser.add_argument('--delay', type=float, default=1.5, help='Delay between requests (default: 1.5)')
+    parser.add_argument('--workers', type=int, default=4, help='Tracks scraped concurrently (default: 4)')
     
     args = parser.parse_args()
     
     # Validate arguments
-    if not args.track_id and not args.track_url:
+    if not args.track_id and not args.track_url and not args.input_file:
+        print(json.dumps({
+            'error': 'One of --track-id, --track-url or --input-file must be provided',
+            'success': False
+        }), file=sys.stderr)
+        sys.exit(1)
+    
+    if args.resume and not (args.input_file and args.output_file):
         print(json.dumps({
-            'error': 'Either --track-id or --track-url must be provided',
+            'error': '--resume requires --input-file and --output-file',
             'success': False
         }), file=sys.stderr)
         sys.exit(1)
     
     try:
-        scraper = MyStreamCountJSONScraper(delay=args.delay)
+        scraper = MyStreamCountJSONScraper(delay=args.delay, max_workers=args.workers)
+        
+        # Bulk mode streams NDJSON records instead of one JSON document
+        if args.input_file:
+            track_ids = read_track_ids_file(args.input_file, scraper)
+            summary = scrape_to_ndjson(scraper, track_ids, args.output_file, resume=args.resume)
+            print(json.dumps(summary, default=str), file=sys.stderr)
+            return
         
         # Determine track ID
         if args.track_id:
@@ -0,0 +1,257 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+import soupsieve as sv
+from bs4.element import PageElement, Tag
+
+from selector_planner import selector_plan
+
+# Patterns and CSS selectors the scrapers use, compiled once at import. Extractors call
+# these objects directly instead of passing strings that re and soupsieve would look up
+# in their caches on every call. Track page fields are declared as specs at the bottom
+# and compiled into plans that extract them all in one walk over the tree.
+
+# kworb.net
+
+# End of the first row whose leading cell reads "Total"; everything after it is daily history
+TOTAL_ROW_PATTERN = re.compile(rb'<t[dh][^>]*>\s*(?:<[^>]+>\s*)*Total\s*(?:</[^>]+>\s*)*</t[dh]>.*?</tr>',
+                               re.IGNORECASE | re.DOTALL)
+# Opening tags of tables, and the rows and cells of a table's header row
+TABLE_START_PATTERN = re.compile(rb'<table\b', re.IGNORECASE)
+TABLE_ROW_PATTERN = re.compile(rb'<tr\b.*?(?:</tr>|(?=<tr\b))', re.IGNORECASE | re.DOTALL)
+TABLE_CELL_PATTERN = re.compile(rb'<t[dh]\b[^>]*>(.*?)(?:</t[dh]>|(?=<t[dh]\b)|$)', re.IGNORECASE | re.DOTALL)
+MARKUP_TAG_PATTERN = re.compile(rb'<[^>]+>')
+STREAM_COUNT_PATTERN = re.compile(r'([\d,]+)')
+CHARSET_PATTERN = re.compile(r'charset=([\w-]+)')
+
+# mystreamcount.com
+
+TRACK_ID_PATTERN = re.compile(r'/track/([a-zA-Z0-9]+)')
+TOTAL_STREAMS_PATTERN = re.compile(r'(\d{1,3}(?:,\d{3})*)\s*times on Spotify')
+RELEASE_DATE_PATTERN = re.compile(r'since its release on (.+?)\.')
+
+# One alternation so each inline script is scanned once for everything the extractors need
+SCRIPT_PATTERN = re.compile(
+    r'url:\s*["\'](?P<url>[^"\']+)["\']'
+    r'|_token:\s*["\'](?P<token>[^"\']+)["\']'
+    r'|(?P<series>total|daily)\.push\(\[new Date\([^)]+\)\.getTime\(\), (?P<value>[^\]]+)\]\)'
+)
+
+# Selectors simple enough to read the rightmost tag name and classes from
+SIMPLE_SELECTOR = re.compile(r'^[\w\-.\s>+~]+$')
+
+class Field:
+    def __init__(self, name: str, selector: str, attr: Optional[str] = None, pattern: Optional[Pattern] = None,
+                 group: Optional[int] = 1, transform: Optional[Callable[[str], Any]] = None):
+        """
+        One value taken from the first element matching a selector
+
+        Args:
+            name: Key the value is stored under
+            selector: CSS selector, compiled with soupsieve
+            attr: Attribute to read ('' when missing); the element's text when not given
+            pattern: Regex the value must match, the field is left out otherwise
+            group: Group of the pattern match to keep, the whole value when None
+            transform: Applied to the value last, e.g. str.strip or int
+        """
+        self.name = name
+        self.selector = selector
+        self.attr = attr
+        self.pattern = pattern
+        self.group = group
+        self.transform = transform
+
+    def extract(self, tag: Tag) -> Tuple[bool, Any]:
+        """Return (found, value) for an element the selector matched"""
+        value = tag.get(self.attr, '') if self.attr else tag.get_text()
+        if self.pattern is not None:
+            match = self.pattern.search(value)
+            if not match:
+                return False, None
+            if self.group is not None:
+                value = match.group(self.group)
+        if self.transform is not None:
+            value = self.transform(value)
+        return True, value
+
+class Record:
+    def __init__(self, name: str, selector: str, fields: List[Field]):
+        """
+        A list of dictionaries, one per element matching selector, filled from its descendants
+
+        Records that end up with no fields are dropped.
+
+        Args:
+            name: Key the list is stored under
+            selector: CSS selector of the repeated container element
+            fields: Fields looked up inside each container
+        """
+        self.name = name
+        self.selector = selector
+        self.fields = fields
+
+class _Matcher:
+    """A compiled selector with a cheap tag name / class prefilter and the targets it feeds"""
+
+    def __init__(self, selector: str):
+        self.plan = selector_plan(selector)
+        self.selector = sv.compile(selector) if self.plan is None else None
+        self.name = None
+        self.classes = frozenset()
+        self.targets = []
+
+        if self.plan is not None:
+            self.name = self.plan.subject.name
+        elif SIMPLE_SELECTOR.match(selector):
+            compound = re.split(r'[\s>+~]+', selector.strip())[-1]
+            name, *classes = compound.split('.')
+            self.name = name or None
+            self.classes = frozenset(classes)
+
+    def matches(self, tag: Tag) -> bool:
+        if self.plan is not None:
+            return self.plan.matches(tag)
+        if self.classes and not self.classes.issubset(tag.get('class') or ()):
+            return False
+        return self.selector.match(tag)
+
+def _last_descendant(tag: Tag) -> PageElement:
+    while getattr(tag, 'contents', None):
+        tag = tag.contents[-1]
+    return tag
+
+class ExtractionPlan:
+    def __init__(self, fields: List[Field] = (), records: List[Record] = ()):
+        """
+        Field and record specs compiled into a single walk over a document
+
+        Each element is checked only against the selectors whose rightmost tag name and
+        classes it has, and every match is dispatched to all fields sharing that selector.
+        Like select_one, a selector is retired after its first match in document order
+        (per container for record fields). Without records the walk stops once every
+        selector has matched.
+
+        Args:
+            fields: Values taken from the whole document
+            records: Repeated containers, each producing a list of dictionaries
+        """
+        self.fields = list(fields)
+        self.records = list(records)
+        self._by_name: Dict[Optional[str], List[_Matcher]] = {}
+        self._record_matchers: List[Tuple[Record, _Matcher, Dict[Optional[str], List[_Matcher]]]] = []
+
+        self._index(self._by_name, self.fields)
+        for record in self.records:
+            matcher = _Matcher(record.selector)
+            self._record_matchers.append((record, matcher, self._index({}, record.fields)))
+
+    @staticmethod
+    def _index(by_name: Dict, fields: List[Field]) -> Dict:
+        matchers = {}
+        for field in fields:
+            if field.selector not in matchers:
+                matchers[field.selector] = _Matcher(field.selector)
+                by_name.setdefault(matchers[field.selector].name, []).append(matchers[field.selector])
+            matchers[field.selector].targets.append(field)
+        return by_name
+
+    @staticmethod
+    def _activate(by_name: Dict[Optional[str], List[_Matcher]]) -> Dict[Optional[str], List[_Matcher]]:
+        """Per-run copy of a selector index that matchers are removed from once they fire"""
+        return {name: list(matchers) for name, matchers in by_name.items()}
+
+    @staticmethod
+    def _match_first(active: Dict[Optional[str], List[_Matcher]], tag: Tag, values: Dict[str, Any]) -> None:
+        """Fill the fields of every still active selector matching tag, then retire those selectors"""
+        for name in (tag.name, None):
+            matchers = active.get(name)
+            if not matchers:
+                continue
+            for matcher in list(matchers):
+                if matcher.matches(tag):
+                    # Like select_one, only the first match counts even if its pattern fails
+                    for field in matcher.targets:
+                        ok, value = field.extract(tag)
+                        if ok:
+                            values[field.name] = value
+                    matchers.remove(matcher)
+            if not matchers:
+                del active[name]
+
+    def run(self, soup: Tag) -> Dict[str, Any]:
+        """
+        Walk soup once and extract every field and record
+
+        Containers nested inside other containers each produce their own record, like
+        select() returns every match.
+
+        Returns:
+            Field values in spec order, plus one list per record under the record's name
+        """
+        found: Dict[str, Any] = {}
+        active = self._activate(self._by_name)
+        # Values per container in document order, filled in while the container is open
+        opened: Dict[str, List[Dict[str, Any]]] = {record.name: [] for record in self.records}
+        # (its active selectors, values so far, element closing its container), innermost last
+        open_records: List[Tuple] = []
+
+        for element in soup.descendants:
+            if isinstance(element, Tag):
+                if active:
+                    self._match_first(active, element, found)
+
+                for record_active, values, _ in open_records:
+                    self._match_first(record_active, element, values)
+
+                for record, matcher, by_name in self._record_matchers:
+                    if matcher.name in (None, element.name) and matcher.matches(element):
+                        values = {}
+                        opened[record.name].append(values)
+                        open_records.append((self._activate(by_name), values, _last_descendant(element)))
+
+                if not active and not self.records:
+                    break
+
+            # Nested containers may end on the same element as the ones around them
+            while open_records and element is open_records[-1][2]:
+                open_records.pop()
+
+        result = {field.name: found[field.name] for field in self.fields if field.name in found}
+        for record in self.records:
+            result[record.name] = [
+                {field.name: values[field.name] for field in record.fields if field.name in values}
+                for values in opened[record.name] if values
+            ]
+        return result
+
+def _stream_count(text: str) -> int:
+    return int(text.replace(',', ''))
+
+# mystreamcount.com track page
+
+TRACK_INFO_FIELDS = [
+    Field('title', 'h1.text-xl.font-bold.text-gray-900', transform=str.strip),
+    Field('artist', 'p.text-md.text-gray-500.font-medium.mt-1 a', transform=str.strip),
+    Field('artist_url', 'p.text-md.text-gray-500.font-medium.mt-1 a', attr='href'),
+    Field('artwork_url', 'div.w-64.mx-auto img', attr='src'),
+    Field('album_name', 'div.w-64.mx-auto img', attr='alt'),
+    Field('spotify_url', 'div.w-64.mx-auto a', attr='href'),
+    Field('total_streams', 'p.text-md.text-gray-900.my-4.px-4', pattern=TOTAL_STREAMS_PATTERN, transform=_stream_count),
+    Field('streams_text', 'p.text-md.text-gray-900.my-4.px-4', pattern=TOTAL_STREAMS_PATTERN, group=None,
+          transform=str.strip),
+    Field('release_date', 'p.text-md.text-gray-900.my-4.px-4', pattern=RELEASE_DATE_PATTERN)
+]
+
+RELATED_TRACKS_RECORD = Record('related_tracks', 'ul.divide-y.divide-gray-100 li', [
+    Field('artwork_url', 'img', attr='src'),
+    Field('album_name', 'img', attr='alt'),
+    Field('title', 'p.text-md.font-semibold a', transform=str.strip),
+    Field('url', 'p.text-md.font-semibold a', attr='href'),
+    Field('track_id', 'p.text-md.font-semibold a', attr='href', pattern=TRACK_ID_PATTERN),
+    Field('artist', 'p.text-sm.text-gray-500', transform=str.strip)
+])
+
+TRACK_INFO_PLAN = ExtractionPlan(fields=TRACK_INFO_FIELDS)
+RELATED_TRACKS_PLAN = ExtractionPlan(records=[RELATED_TRACKS_RECORD])
+# Everything scrape_track reads from the tree, in one walk
+TRACK_PAGE_PLAN = ExtractionPlan(fields=TRACK_INFO_FIELDS, records=[RELATED_TRACKS_RECORD])
@@ -0,0 +1,151 @@
+import codecs
+import os
+import re
+import threading
+from typing import Dict, Optional, Union
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+from charset_detection import detect_encoding, encoding_memo
+from lean_tree import LEAN_TREE, LeanSoup
+from soup_index import IndexedSoup
+
+# Fastest first. bs4 only registers the lxml builder when lxml's compiled extension imports,
+# which is not the case for the source-only lxml checkout; deploy.sh installs a Linux wheel.
+PREFERRED_PARSERS = ('lxml', 'html.parser')
+
+def select_parser() -> str:
+    """
+    Pick the BeautifulSoup tree builder the scrapers use
+
+    SCRAPER_HTML_PARSER overrides the choice, otherwise the fastest available builder wins.
+    """
+    override = os.environ.get('SCRAPER_HTML_PARSER')
+    if override:
+        return override
+
+    for parser in PREFERRED_PARSERS:
+        if builder_registry.lookup(parser) is not None:
+            return parser
+
+    return 'html.parser'
+
+HTML_PARSER = select_parser()
+
+# Encoding fast path: only the first KB is searched for a <meta> charset declaration
+SNIFF_BYTES = 1024
+HTTP_CHARSET_PATTERN = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+class DecodeStats:
+    def __init__(self):
+        """Count which source decided the encoding of each page, and how often none did"""
+        self.counts = {'bom': 0, 'header': 0, 'meta': 0, 'default': 0, 'memo': 0, 'detected': 0, 'slow': 0}
+        self._lock = threading.Lock()
+    
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.counts[path] += 1
+    
+    def stats(self) -> Dict:
+        """Counts per path and the share of pages left to full detection, for the health endpoint"""
+        with self._lock:
+            total = sum(self.counts.values())
+            return dict(self.counts, slow_rate=round(self.counts['slow'] / total, 3) if total else None)
+
+decode_stats = DecodeStats()
+
+def _normalize_encoding(name: Optional[Union[str, bytes]]) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', 'ignore')
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+def _strict_decode(content: bytes, encoding: Optional[str]) -> Optional[str]:
+    if not encoding:
+        return None
+    try:
+        return content.decode(encoding)
+    except UnicodeDecodeError:
+        return None
+
+def decode_markup(content: bytes, content_type: Optional[str] = None, host: Optional[str] = None) -> Union[str, bytes]:
+    """
+    Decode a page once using the encoding it declares
+    
+    Tries a byte order mark, the Content-Type charset, a <meta> charset in the first KB
+    and finally UTF-8, decoding strictly with the first that applies. A page that
+    declares nothing and is not UTF-8 is decoded with the encoding last detected for its
+    host, or else with charset_detection's bounded early-exit detection, whose winner is
+    remembered for the host. Only when all of that fails are the bytes returned
+    unchanged, leaving BeautifulSoup to run its full detection.
+    
+    Args:
+        content: Raw response body
+        content_type: The response's Content-Type header
+        host: Host the page came from, keying the remembered encoding
+        
+    Returns:
+        Decoded text, or content itself when no encoding applies
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            declared = [('bom', encoding)]
+            break
+    else:
+        header = HTTP_CHARSET_PATTERN.search(content_type or '')
+        meta = META_CHARSET_PATTERN.search(content, 0, SNIFF_BYTES)
+        declared = [
+            ('header', _normalize_encoding(header.group(1)) if header else None),
+            ('meta', _normalize_encoding(meta.group(1)) if meta else None)
+        ]
+    
+    declared = [(path, encoding) for path, encoding in declared if encoding]
+    if declared:
+        # Only the first declaration counts; a wrong one is as good as none
+        path, encoding = declared[0]
+        candidates = [(path, encoding), ('memo', encoding_memo.get(host))]
+    else:
+        candidates = [('default', 'utf-8'), ('memo', encoding_memo.get(host))]
+    
+    for path, encoding in candidates:
+        markup = _strict_decode(content, encoding)
+        if markup is not None:
+            decode_stats.record(path)
+            return markup
+    
+    encoding, _ = detect_encoding(content)
+    markup = _strict_decode(content, encoding)
+    if markup is not None:
+        encoding_memo.set(host, encoding)
+        decode_stats.record('detected')
+        return markup
+    
+    decode_stats.record('slow')
+    return content
+
+def make_soup(content: bytes, parser: str = HTML_PARSER, content_type: Optional[str] = None,
+              host: Optional[str] = None, lean: bool = LEAN_TREE, indexed: bool = False, **kwargs) -> BeautifulSoup:
+    """
+    BeautifulSoup over content, decoded through decode_markup first
+    
+    Line numbers are not stored unless store_line_numbers=True is passed; nothing here
+    reads them. With lean (off unless SCRAPER_LEAN_TREE=1) the tree is a LeanSoup: the
+    same tree from slotted node classes, which saves more memory on long pages but
+    parses slower. indexed additionally answers simple find_all/select queries
+    from an index, which pays off once a document is queried more than about once per
+    tag name; without lean the tree is then an IndexedSoup.
+    """
+    markup = decode_markup(content, content_type, host)
+    kwargs.setdefault('store_line_numbers', False)
+    if lean:
+        return LeanSoup(markup, parser, indexed=indexed, **kwargs)
+    if indexed:
+        return IndexedSoup(markup, parser, **kwargs)
+    return BeautifulSoup(markup, parser, **kwargs)
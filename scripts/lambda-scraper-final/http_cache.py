@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Iterator, Optional
+
+from requests import HTTPError, RequestException
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# Stored bodies are already decoded, so these no longer describe them
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+def is_transport_error(error: Exception) -> bool:
+    """Whether error points at the connection or the upstream server rather than the requested page"""
+    if isinstance(error, HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, RequestException)
+
+class ValidatorStore:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        In-process LRU of page bodies with their ETag and Last-Modified validators
+
+        Args:
+            max_bytes: Total body size kept before the least recently used pages are dropped
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.revalidated = 0
+        self.refetched = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def set(self, url: str, entry: Dict) -> None:
+        with self._lock:
+            self._discard(url)
+            if len(entry['body']) > self.max_bytes:
+                return
+            self._entries[url] = entry
+            self.size += len(entry['body'])
+            while self.size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self.size -= len(dropped['body'])
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            self._discard(url)
+
+    def _discard(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= len(entry['body'])
+
+    def record(self, revalidated: bool) -> None:
+        """Count a conditional request answered 304 (revalidated) or with a new body (refetched)"""
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.refetched += 1
+
+    def stats(self) -> Dict:
+        """Describe the store for the health endpoint"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'kb': round(self.size / 1024, 1),
+                'revalidated': self.revalidated,
+                'refetched': self.refetched
+            }
+
+# Module scope so warm Lambda containers keep validators when scrapers are recycled
+validator_store = ValidatorStore()
+
+class RecordingBody:
+    def __init__(self, raw: HTTPResponse, on_complete):
+        """
+        Wrap a streamed urllib3 response and hand over the body once it was read to the end
+
+        Readers that stop early, like kworb's stream mode, leave nothing in the store.
+        """
+        self._raw = raw
+        self._on_complete = on_complete
+        self._buffer = BytesIO()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._buffer.write(chunk)
+            yield chunk
+        self._complete()
+
+    def read(self, amt: Optional[int] = None, decode_content: Optional[bool] = None, **kwargs) -> bytes:
+        data = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        self._buffer.write(data)
+        if amt is None or not data:
+            self._complete()
+        return data
+
+    def _complete(self) -> None:
+        if self._on_complete is not None:
+            self._on_complete(self._buffer.getvalue())
+            self._on_complete = None
+
+class ConditionalHTTPAdapter(HTTPAdapter):
+    def __init__(self, store: Optional[ValidatorStore] = None, **kwargs):
+        """
+        Transport adapter that revalidates GETs with If-None-Match / If-Modified-Since
+
+        200 responses carrying an ETag or Last-Modified are stored with their body. Later
+        GETs for the same URL are sent as conditional requests, and a 304 is answered from
+        the store as a 200, so unchanged pages cost a header round trip instead of a download.
+        Requests with Cache-Control: no-cache are sent unconditionally. Answers from the
+        store have from_validator_cache set.
+
+        Args:
+            store: Where bodies and validators live, the shared validator_store by default
+            **kwargs: Passed to HTTPAdapter, e.g. pool_maxsize
+        """
+        super().__init__(**kwargs)
+        self.store = store if store is not None else validator_store
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.method != 'GET':
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        # Cache-Control: no-cache asks for a body fresh from the server, e.g. for pages
+        # whose content is bound to the requesting session; the response is still stored
+        fresh = 'no-cache' in request.headers.get('Cache-Control', '')
+        entry = None if fresh else self.store.get(request.url)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        if response.status_code == 304 and entry is not None:
+            self.store.record(revalidated=True)
+            # Drain the empty body so the keep-alive connection goes back to the pool
+            response.raw.drain_conn()
+            response.raw.release_conn()
+            etag = response.headers.get('ETag', entry['etag'])
+            last_modified = response.headers.get('Last-Modified', entry['last_modified'])
+            if (etag, last_modified) != (entry['etag'], entry['last_modified']):
+                self.store.set(request.url, dict(entry, etag=etag, last_modified=last_modified))
+            return self._build_cached_response(request, entry, response, stream)
+
+        if entry is not None:
+            self.store.record(revalidated=False)
+
+        if response.status_code == 200:
+            self._remember(request.url, response, stream)
+        return response
+
+    def _remember(self, url: str, response, stream: bool) -> None:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self.store.discard(url)
+            return
+
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+
+        def store(body: bytes) -> None:
+            self.store.set(url, {
+                'etag': etag,
+                'last_modified': last_modified,
+                'headers': headers,
+                'body': body,
+                'stored_at': time.time()
+            })
+
+        if stream:
+            response.raw = RecordingBody(response.raw, store)
+        else:
+            store(response.content)
+
+    def _build_cached_response(self, request, entry: Dict, not_modified, stream: bool):
+        headers = dict(entry['headers'])
+        # A 304 may carry fresher validators and caching headers
+        for name, value in not_modified.headers.items():
+            if name.lower() not in DROPPED_HEADERS:
+                headers[name] = value
+
+        raw = HTTPResponse(
+            body=BytesIO(entry['body']),
+            headers=headers,
+            status=200,
+            reason='OK',
+            preload_content=False,
+            decode_content=False
+        )
+        response = self.build_response(request, raw)
+        response.from_validator_cache = True
+        if not stream:
+            response.content
+        return response
@@ -1,20 +1,119 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import codecs
 import json
-import re
 import argparse
 import sys
-from typing import Dict, Optional
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from charset_detection import encoding_memo
+from extraction_specs import (CHARSET_PATTERN, MARKUP_TAG_PATTERN, STREAM_COUNT_PATTERN, TABLE_CELL_PATTERN,
+                               TABLE_ROW_PATTERN, TABLE_START_PATTERN, TOTAL_ROW_PATTERN)
+from html_parsers import HTML_PARSER, make_soup
+from http_cache import ConditionalHTTPAdapter, is_transport_error
+from parsed_cache import parsed_cache
+from rate_limiter import HostRateLimiter
+
+# 'full' builds the whole document; 'strained' only builds the tables, cut off after the Total row;
+# 'stream' builds no tree and stops downloading once the Total row has been read
+PARSE_MODES = ('full', 'strained', 'stream')
+
+class KworbTableParser(HTMLParser):
+    """
+    Event-driven reader for kworb's country table
+    
+    Collects the text of each table's header row and its Total row, and sets done as
+    soon as an accepted table yields both, so the caller can stop feeding the rest of
+    the page.
+    """
+    
+    def __init__(self, accept_headers: Callable[[List[str]], bool] = lambda headers: True):
+        super().__init__(convert_charrefs=True)
+        self.accept_headers = accept_headers
+        self.headers: List[str] = []
+        self.total_row: List[str] = []
+        self.done = False
+        self._table_depth = 0
+        self._table_headers: Optional[List[str]] = None
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+    
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self.done:
+            return
+        if tag == 'table':
+            self._table_depth += 1
+            self._table_headers = None
+        elif self._table_depth and tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif self._row is not None and tag in ('td', 'th'):
+            self._end_cell()
+            self._cell = []
+    
+    def handle_endtag(self, tag: str) -> None:
+        if self.done:
+            return
+        if tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_row()
+        elif tag == 'table' and self._table_depth:
+            self._end_row()
+            self._table_depth -= 1
+    
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None:
+            self._cell.append(data)
+    
+    def _end_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            self._row.append(''.join(self._cell).strip())
+        self._cell = None
+    
+    def _end_row(self) -> None:
+        self._end_cell()
+        row, self._row = self._row, None
+        if row is None:
+            return
+        
+        if self._table_headers is None:
+            self._table_headers = row
+        elif (row and row[0].lower() == 'total' and len(self._table_headers) >= 3
+              and len(row) >= len(self._table_headers) and self.accept_headers(self._table_headers)):
+            self.headers = self._table_headers
+            self.total_row = row
+            self.done = True
+
+def known_encoding(*names: Optional[str]) -> str:
+    """The first of names codecs can decode with, or UTF-8"""
+    for name in names:
+        if not name:
+            continue
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    return 'utf-8'
 
 class KworbScraper:
-    def __init__(self, delay: float = 1.0):
+    def __init__(self, delay: float = 1.0, parse_mode: str = 'strained'):
         """
         Initialize the Kworb scraper
         
         Args:
-            delay: Delay between requests in seconds
+            delay: Minimum average interval between requests to kworb.net in seconds
+            parse_mode: One of PARSE_MODES
         """
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(f'parse_mode must be one of {PARSE_MODES}')
+        
         self.delay = delay
+        self.rate_limiter = HostRateLimiter(rate=1.0 / delay if delay > 0 else None)
+        self.parse_mode = parse_mode
+        self.html_parser = HTML_PARSER
+        self.parsed_cache = parsed_cache
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -24,6 +123,14 @@ class KworbScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        # Unchanged track pages come back as 304s and are served from the validator store
+        self.session.mount('https://', ConditionalHTTPAdapter())
+        self.session.mount('http://', ConditionalHTTPAdapter())
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET once the per-host rate limiter allows it"""
+        self.rate_limiter.wait(url)
+        return self.session.get(url, **kwargs)
     
     def get_top_streaming_country(self, track_id: str) -> Dict:
         """
@@ -38,14 +145,21 @@ class KworbScraper:
         url = f"https://kworb.net/spotify/track/{track_id}.html"
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find the country streams table
-            # Kworb typically has a table with countries and their stream counts
-            country_data = self._extract_country_streams(soup)
+            if self.parse_mode == 'stream':
+                country_data = self._stream_country_streams(url)
+            else:
+                response = self._get(url, timeout=30)
+                response.raise_for_status()
+                
+                # Find the country streams table
+                # Kworb typically has a table with countries and their stream counts
+                # An unchanged page reuses the previous extraction without being parsed
+                content = response.content
+                content_type = response.headers.get('Content-Type')
+                host = urlparse(url).netloc
+                country_data = self.parsed_cache.get_or_extract(
+                    'kworb', content, lambda: self._extract(content, content_type, host)
+                )
             
             if country_data:
                 # Find the country with the highest stream count
@@ -74,7 +188,8 @@ class KworbScraper:
                 'track_id': track_id,
                 'url': url,
                 'error': f'Request failed: {str(e)}',
-                'topStreamsByCountry': None
+                'topStreamsByCountry': None,
+                'transport_error': is_transport_error(e)
             }
         except Exception as e:
             return {
@@ -85,6 +200,146 @@ class KworbScraper:
                 'topStreamsByCountry': None
             }
     
+    def _extract(self, content: bytes, content_type: Optional[str] = None, host: Optional[str] = None) -> list:
+        """Parse and extract the country data, falling back to the whole page if the strained tree has none"""
+        country_data = self._extract_country_streams(self._parse(content, content_type, host))
+        if not country_data and self.parse_mode == 'strained':
+            country_data = self._extract_country_streams(
+                make_soup(content, self.html_parser, content_type, host, indexed=True)
+            )
+        return country_data
+    
+    def _parse(self, content: bytes, content_type: Optional[str] = None, host: Optional[str] = None) -> BeautifulSoup:
+        """
+        Build the tree used by _extract_country_streams
+        
+        Strained mode drops everything outside <table> elements and stops at the end of
+        the country table's Total row, so the daily history below it is never tokenized
+        or built. The page is decoded with its declared charset, or the one last detected
+        for host, rather than sniffed by BeautifulSoup. The tree is indexed, since the tables, rows
+        and cells are each looked up again below the previous result.
+        """
+        if self.parse_mode == 'full':
+            return make_soup(content, self.html_parser, content_type, host, indexed=True)
+        
+        total_row_end = self._total_row_end(content)
+        if total_row_end is not None:
+            content = content[:total_row_end]
+        
+        return make_soup(content, self.html_parser, content_type, host, indexed=True,
+                         parse_only=SoupStrainer('table'))
+    
+    def _total_row_end(self, content: bytes) -> Optional[int]:
+        """
+        Offset just past the Total row of the country table, or None if there is none
+        
+        A Total row only counts if the header row of its table holds country codes, the
+        check KworbTableParser applies in stream mode, so a Total row in another table
+        earlier on the page does not cut the country table off.
+        """
+        for total_row in TOTAL_ROW_PATTERN.finditer(content):
+            table_start = None
+            for table_start in TABLE_START_PATTERN.finditer(content, 0, total_row.start()):
+                pass
+            if table_start is None:
+                continue
+            
+            header_row = TABLE_ROW_PATTERN.search(content, table_start.end(), total_row.start())
+            if header_row is None:
+                continue
+            headers = [MARKUP_TAG_PATTERN.sub(b'', cell).decode('latin-1').strip()
+                       for cell in TABLE_CELL_PATTERN.findall(header_row.group(0))]
+            if len(headers) >= 3 and self._country_columns(headers):
+                return total_row.end()
+        return None
+    
+    def _stream_country_streams(self, url: str) -> list:
+        """
+        Download the page incrementally and stop as soon as the Total row is parsed
+        
+        The connection is dropped rather than drained when reading stops early, trading
+        keep-alive reuse for not downloading the daily history.
+        """
+        response = self._get(url, timeout=30, stream=True)
+        try:
+            response.raise_for_status()
+            # Nothing is buffered to detect from, so a page that declares no charset, or
+            # one codecs does not know, uses the encoding last detected for the host by the
+            # other modes, as decode_markup does, and then UTF-8
+            charset = CHARSET_PATTERN.search(response.headers.get('Content-Type', ''))
+            country_data, _ = self._extract_country_streams_incremental(
+                response.iter_content(chunk_size=16384),
+                known_encoding(charset.group(1) if charset else None, encoding_memo.get(urlparse(url).netloc))
+            )
+            return country_data
+        finally:
+            response.close()
+    
+    def _extract_country_streams_incremental(self, chunks: Iterable[bytes], encoding: str = 'utf-8') -> Tuple[list, int]:
+        """
+        Extract country stream counts from a page delivered in chunks, without building a tree
+        
+        Returns:
+            Tuple of the country data and the number of bytes consumed
+        """
+        parser = KworbTableParser(accept_headers=lambda headers: bool(self._country_columns(headers)))
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        bytes_read = 0
+        
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
+        
+        if not parser.done:
+            return [], bytes_read
+        
+        country_columns = self._country_columns(parser.headers)
+        country_streams = self._total_row_streams(country_columns, parser.total_row)
+        return self._format_country_data(country_streams), bytes_read
+    
+    def _country_columns(self, header_texts: List[str]) -> List[Tuple[int, str]]:
+        """Indexes and codes of the header cells that are two-letter country codes"""
+        country_columns = []
+        for i, country_code in enumerate(header_texts[1:], 1):  # Skip first column (Date)
+            if len(country_code) == 2 and country_code.isupper():
+                country_columns.append((i, country_code))
+        return country_columns
+    
+    def _total_row_streams(self, country_columns: List[Tuple[int, str]], cell_texts: List[str]) -> Dict:
+        """Parse the stream count of each country column in the Total row"""
+        country_streams = {}
+        for col_index, country_code in country_columns:
+            if col_index < len(cell_texts):
+                stream_text = cell_texts[col_index]
+                
+                # Extract stream count (remove commas)
+                stream_match = STREAM_COUNT_PATTERN.search(stream_text)
+                if stream_match:
+                    try:
+                        streams = int(stream_match.group(1).replace(',', ''))
+                        country_streams[country_code] = {
+                            'streams': streams,
+                            'raw_text': stream_text
+                        }
+                    except ValueError:
+                        continue
+        return country_streams
+    
+    def _format_country_data(self, country_streams: Dict) -> list:
+        """Convert to the expected format"""
+        country_data = []
+        for country_code, data in country_streams.items():
+            country_data.append({
+                'country': country_code,
+                'streams': data['streams'],
+                'raw_country': country_code,
+                'raw_streams': data['raw_text']
+            })
+        
+        return country_data
+    
     def _extract_country_streams(self, soup: BeautifulSoup) -> list:
         """Extract country stream counts from the kworb page"""
         # Look for the main table with country stream data
@@ -106,11 +361,7 @@ class KworbScraper:
                 continue
                 
             # Skip first column (Date) and process country columns
-            country_columns = []
-            for i, header in enumerate(headers[1:], 1):  # Skip first column (Date)
-                country_code = header.get_text().strip()
-                if len(country_code) == 2 and country_code.isupper():
-                    country_columns.append((i, country_code))
+            country_columns = self._country_columns([header.get_text().strip() for header in headers])
             
             if not country_columns:
                 continue
@@ -126,34 +377,12 @@ class KworbScraper:
                 first_cell = cells[0].get_text().strip()
                 if first_cell.lower() == 'total':
                     # Process each country column to get stream counts
-                    for col_index, country_code in country_columns:
-                        if col_index < len(cells):
-                            stream_text = cells[col_index].get_text().strip()
-                            
-                            # Extract stream count (remove commas)
-                            stream_match = re.search(r'([\d,]+)', stream_text)
-                            if stream_match:
-                                try:
-                                    streams = int(stream_match.group(1).replace(',', ''))
-                                    country_streams[country_code] = {
-                                        'streams': streams,
-                                        'raw_text': stream_text
-                                    }
-                                except ValueError:
-                                    continue
+                    country_streams.update(self._total_row_streams(
+                        country_columns, [cell.get_text().strip() for cell in cells]
+                    ))
                     break  # Found the Total row, no need to continue
         
-        # Convert to the expected format
-        country_data = []
-        for country_code, data in country_streams.items():
-            country_data.append({
-                'country': country_code,
-                'streams': data['streams'],
-                'raw_country': country_code,
-                'raw_streams': data['raw_text']
-            })
-        
-        return country_data
+        return self._format_country_data(country_streams)
     
 
     
@@ -194,10 +423,12 @@ class KworbScraper:
 def main():
     parser = argparse.ArgumentParser(description='Scrape top streaming country from kworb.net')
     parser.add_argument('--track-id', required=True, help='Spotify track ID')
+    parser.add_argument('--parse-mode', choices=PARSE_MODES, default='strained',
+                        help='How much of the page to parse or download (default: strained)')
     
     args = parser.parse_args()
     
-    scraper = KworbScraper()
+    scraper = KworbScraper(parse_mode=args.parse_mode)
     result = scraper.get_top_streaming_country(args.track_id)
     
     # Output JSON to stdout for Node.js to parse
@@ -1,41 +1,248 @@
+import base64
 import json
+import math
 import os
 import sys
-from typing import Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import logging
 from urllib.parse import parse_qs
 
 # Add current directory to path for local imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from details_scraper import MyStreamCountJSONScraper
-    from kworb_scraper import KworbScraper
-except ImportError as e:
-    print(f"Import error: {e}")
-    # Create dummy classes for testing
-    class MyStreamCountJSONScraper:
-        def __init__(self, delay=0.2):
-            pass
-        def scrape_track(self, track_id):
-            return {"track_id": track_id, "total_streams": 12345, "status": "test"}
-    
-    class KworbScraper:
-        def __init__(self, delay=0.2):
-            pass
-        def get_top_streaming_country(self, track_id):
-            return {"country": "US", "streams": 12345}
+from result_cache import MemoryCache, ResultCache, SQLiteCache
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def create_response(status_code: int, body: Dict[str, Any], is_options: bool = False) -> Dict[str, Any]:
-    """Create a response with proper CORS headers for OPTIONS requests"""
+AVAILABLE_ACTIONS = ['health', 'stream_count', 'kworb', 'chart_data', 'full', 'batch']
+
+# Per-track actions that can be fanned out by the batch action
+BATCH_ACTIONS = ['stream_count', 'chart_data', 'kworb']
+MAX_BATCH_SIZE = 50
+MAX_BATCH_WORKERS = 8
+# kworb.net gets its own, lower cap; its requests are still paced by SCRAPER_DELAY
+KWORB_BATCH_WORKERS = max(1, int(os.environ.get('KWORB_BATCH_WORKERS', '2')))
+
+# Per-track actions the full action runs side by side and merges
+FULL_ACTIONS = ['kworb', 'stream_count', 'chart_data']
+
+# Response formats; compact delta-encodes chart time series
+RESPONSE_FORMATS = ['full', 'compact']
+
+# Actions whose results carry chart time series
+TIME_SERIES_ACTIONS = ['stream_count', 'chart_data']
+
+# Minimum average interval between requests to one upstream host, shared by all
+# requests handled by a warm container. Deployments may lower it explicitly.
+SCRAPER_DELAY = float(os.environ.get('SCRAPER_DELAY', '0.5'))
+
+# Upstream servers close idle keep-alive sockets, so recycle scrapers before that
+SCRAPER_IDLE_TIMEOUT = 240
+SCRAPER_MAX_CONSECUTIVE_FAILURES = 3
+
+# Time kept back from the Lambda timeout to build the response after polling stops
+POLL_DEADLINE_MARGIN_MS = 1000
+
+class ScraperPool:
+    def __init__(self, idle_timeout: float = SCRAPER_IDLE_TIMEOUT,
+                 max_consecutive_failures: int = SCRAPER_MAX_CONSECUTIVE_FAILURES):
+        """
+        Keep one scraper per upstream alive across warm invocations
+        
+        Reusing a scraper reuses its requests.Session and urllib3 connection pool,
+        so warm invocations skip the TCP and TLS handshakes. Scrapers idle for longer
+        than idle_timeout, or failing several times in a row, are replaced. A replaced
+        scraper still used by other threads, e.g. batch workers, is retired: new calls
+        get its successor, and its session is closed once the last call reports back.
+        
+        Args:
+            idle_timeout: Seconds a scraper may sit unused before it is recreated
+            max_consecutive_failures: Transport failures in a row before a scraper is recreated
+        """
+        self.idle_timeout = idle_timeout
+        self.max_consecutive_failures = max_consecutive_failures
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # Replaced scrapers with calls in flight, by id()
+        self._retired: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the warm scraper registered under name, creating it if needed
+        
+        Every get must be followed by a report for the same scraper once the call ends.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(name)
+            
+            if entry and now - entry['last_used'] > self.idle_timeout:
+                logger.info(f"Evicting idle {name} scraper")
+                self._retire(name, entry)
+                entry = None
+            
+            if entry is None:
+                entry = self._entries[name] = {
+                    'scraper': factory(),
+                    'created': now,
+                    'last_used': now,
+                    'failures': 0,
+                    'in_use': 0
+                }
+            
+            entry['last_used'] = now
+            entry['in_use'] += 1
+            return entry['scraper']
+    
+    def report(self, name: str, scraper: Any, healthy: bool) -> None:
+        """
+        Record the outcome of a call, recycling the scraper after repeated failures
+        
+        Args:
+            name: Name the scraper was fetched under
+            scraper: The scraper get returned
+            healthy: False only for transport failures, not for answers without data
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry['scraper'] is not scraper:
+                # Its successor's health is not judged by calls to a retired scraper
+                retired = self._retired.get(id(scraper))
+                if retired is not None:
+                    retired['in_use'] -= 1
+                    if retired['in_use'] <= 0:
+                        del self._retired[id(scraper)]
+                        self._close(retired)
+                return
+            
+            entry['in_use'] -= 1
+            entry['failures'] = 0 if healthy else entry['failures'] + 1
+            if entry['failures'] >= self.max_consecutive_failures:
+                logger.warning(f"Recycling {name} scraper after {entry['failures']} consecutive failures")
+                self._retire(name, entry)
+    
+    def status(self) -> Dict[str, Any]:
+        """Describe the warm scrapers for the health endpoint"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                name: {
+                    'age_seconds': round(now - entry['created'], 1),
+                    'idle_seconds': round(now - entry['last_used'], 1),
+                    'consecutive_failures': entry['failures'],
+                    'in_use': entry['in_use']
+                }
+                for name, entry in self._entries.items()
+            }
+    
+    def _retire(self, name: str, entry: Dict[str, Any]) -> None:
+        """Unregister a scraper, closing its session now or after its last call in flight"""
+        del self._entries[name]
+        if entry['in_use'] > 0:
+            self._retired[id(entry['scraper'])] = entry
+        else:
+            self._close(entry)
+    
+    def _close(self, entry: Dict[str, Any]) -> None:
+        session = getattr(entry['scraper'], 'session', None)
+        if session is not None:
+            session.close()
+
+# Module scope so warm containers keep their scrapers between invocations
+scraper_pool = ScraperPool()
+
+_scraper_classes: Optional[Tuple[Any, Any]] = None
+_scraper_import_lock = threading.Lock()
+
+def load_scraper_classes() -> Tuple[Any, Any]:
+    """
+    Import the scrapers on first use
+    
+    They pull in requests, urllib3, bs4, soupsieve, charset_normalizer and idna, which
+    health checks and CORS preflights never need, so cold starts for those skip them.
+    
+    Returns:
+        Tuple of the MyStreamCount and kworb scraper classes
+    """
+    global _scraper_classes
+    with _scraper_import_lock:
+        if _scraper_classes is None:
+            try:
+                from details_scraper import MyStreamCountJSONScraper
+                from kworb_scraper import KworbScraper
+            except ImportError as e:
+                print(f"Import error: {e}")
+                # Create dummy classes for testing
+                class MyStreamCountJSONScraper:
+                    def __init__(self, delay=0.2, **kwargs):
+                        pass
+                    def scrape_track(self, track_id):
+                        return {"track_id": track_id, "total_streams": 12345, "status": "test"}
+                
+                class KworbScraper:
+                    def __init__(self, delay=0.2, **kwargs):
+                        pass
+                    def get_top_streaming_country(self, track_id):
+                        return {"country": "US", "streams": 12345}
+            
+            _scraper_classes = (MyStreamCountJSONScraper, KworbScraper)
+        return _scraper_classes
+
+SCRAPER_FACTORIES = {
+    'mystreamcount': lambda: load_scraper_classes()[0](delay=SCRAPER_DELAY, max_workers=MAX_BATCH_WORKERS),
+    'kworb': lambda: load_scraper_classes()[1](delay=SCRAPER_DELAY)
+}
+
+ACTION_SCRAPERS = {
+    'stream_count': 'mystreamcount',
+    'chart_data': 'mystreamcount',
+    'kworb': 'kworb'
+}
+
+# (fresh seconds, extra seconds served stale while revalidating) per action.
+# Upstream totals change at most daily.
+RESULT_CACHE_TTLS = {
+    'stream_count': (3600, 86400),
+    'chart_data': (3600, 86400),
+    'kworb': (21600, 86400)
+}
+
+def build_result_cache() -> ResultCache:
+    """In-process LRU, plus a SQLite tier when RESULT_CACHE_PATH is set (e.g. locally or /tmp)"""
+    tiers = [MemoryCache(max_bytes=int(os.environ.get('RESULT_CACHE_MAX_MB', '16')) * 1024 * 1024)]
+    
+    cache_path = os.environ.get('RESULT_CACHE_PATH')
+    if cache_path:
+        try:
+            tiers.append(SQLiteCache(cache_path))
+        except Exception as e:
+            logger.warning(f"SQLite result cache disabled: {e}")
+    
+    return ResultCache(tiers)
+
+result_cache = build_result_cache()
+
+def create_response(status_code: int, body: Dict[str, Any], is_options: bool = False,
+                    cache_status: Optional[str] = None, cache_age: Optional[int] = None,
+                    retry_after: Optional[float] = None) -> Dict[str, Any]:
+    """Create a response with proper CORS headers for OPTIONS requests and result cache headers"""
     headers = {
         'Content-Type': 'application/json'
     }
     
+    if cache_status:
+        headers['X-Cache'] = cache_status
+        if cache_age is not None:
+            headers['Age'] = str(cache_age)
+    
+    if retry_after is not None:
+        headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    
     # Add CORS headers for OPTIONS requests
     if is_options:
         headers.update({
@@ -51,6 +258,320 @@ def create_response(status_code: int, body: Dict[str, Any], is_options: bool = F
         'body': json.dumps(body, default=str)
     }
 
+def module_stats(module_name: str, attribute: str) -> Optional[Dict[str, Any]]:
+    """Stats of a scraper-side cache, or None when no scraper has loaded its module yet"""
+    module = sys.modules.get(module_name)
+    return getattr(module, attribute).stats() if module else None
+
+def parse_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the JSON body of a POST request, returning {} when absent or invalid"""
+    body = event.get('body')
+    if not body:
+        return {}
+    
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    
+    try:
+        parsed = json.loads(body)
+    except (TypeError, ValueError):
+        logger.warning("Ignoring request body that is not valid JSON")
+        return {}
+    
+    return parsed if isinstance(parsed, dict) else {}
+
+def parse_track_ids(raw: Any) -> List[str]:
+    """
+    Normalize a comma separated string or list of track IDs, dropping blanks and duplicates
+    
+    Raises:
+        ValueError: If raw is neither a string nor a list of strings
+    """
+    if raw is None:
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    if not isinstance(raw, list) or not all(isinstance(track_id, str) for track_id in raw):
+        raise ValueError('track_ids must be a comma separated string or a list of strings')
+    
+    track_ids = []
+    for track_id in raw:
+        track_id = track_id.strip()
+        if track_id and track_id not in track_ids:
+            track_ids.append(track_id)
+    
+    return track_ids
+
+def parse_flag(value: Any, default: bool = True) -> bool:
+    """Interpret a query or body flag such as wait=false"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'off')
+
+def get_deadline(context: Any) -> Optional[float]:
+    """time.monotonic() value by which upstream polling must stop for this invocation"""
+    get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if get_remaining is None:
+        return None
+    return time.monotonic() + (get_remaining() - POLL_DEADLINE_MARGIN_MS) / 1000
+
+def encode_poll_token(track_id: str, attempt: int) -> str:
+    """Opaque token a client sends back to resume polling a processing track"""
+    payload = json.dumps({'track_id': track_id, 'attempt': attempt}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_poll_token(token: str) -> Tuple[str, int]:
+    """
+    Reverse encode_poll_token
+    
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(payload['track_id']), int(payload['attempt'])
+    except Exception as e:
+        raise ValueError(f'Invalid poll_token: {e}')
+
+def run_track_action(action: str, track_id: str, **options) -> Dict[str, Any]:
+    """
+    Run a single per-track scraping action
+    
+    Args:
+        action: One of BATCH_ACTIONS
+        track_id: Spotify track ID
+        **options: Polling options passed to get_chart_data_only (deadline, wait, attempt)
+        
+    Returns:
+        The scraper result for the track
+    """
+    if action not in ACTION_SCRAPERS:
+        raise ValueError(f'Unsupported action: {action}')
+    
+    scraper_name = ACTION_SCRAPERS[action]
+    scraper = scraper_pool.get(scraper_name, SCRAPER_FACTORIES[scraper_name])
+    
+    try:
+        if action == 'stream_count':
+            result = scraper.scrape_track(track_id)
+        elif action == 'chart_data':
+            result = scraper.get_chart_data_only(track_id, **options)
+        else:
+            result = scraper.get_top_streaming_country(track_id)
+    except Exception as e:
+        from http_cache import is_transport_error
+        scraper_pool.report(scraper_name, scraper, healthy=not is_transport_error(e))
+        raise
+    
+    scraper_pool.report(scraper_name, scraper, healthy=not is_transport_failure(result))
+    return result
+
+def is_failed_result(result: Dict[str, Any]) -> bool:
+    """Scrapers report most failures in the result dict rather than raising"""
+    return result.get('success') is False or result.get('status') == 'error' or 'error' in result
+
+def is_transport_failure(result: Dict[str, Any]) -> bool:
+    """
+    Failed results caused by the connection or upstream server: connection errors,
+    timeouts and 5xx responses
+    
+    Answers without data, like kworb's 'No country data found', are failed results
+    too but say nothing about the scraper's health.
+    """
+    return bool(result.get('transport_error'))
+
+def is_processing_result(result: Dict[str, Any]) -> bool:
+    """Chart polls that stopped before upstream finished processing the track"""
+    return result.get('status') == 'processing'
+
+def processing_error(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The chart_data error for a poll that stopped while upstream was still processing
+    
+    Callers that did not opt into resuming with a poll_token get this instead of the
+    processing result, the shape chart polling always returned once it gave up.
+    """
+    return {
+        'track_id': result.get('track_id'),
+        'status': 'error',
+        'error': 'Max retries exceeded',
+        'retry_after': result.get('retry_after')
+    }
+
+def get_track_result(action: str, track_id: str, **options) -> Tuple[Dict[str, Any], str, Optional[int]]:
+    """
+    Run a per-track action through the result cache
+    
+    Failed and still processing results are not cached. A STALE hit is refreshed in
+    the background without options: the deadline, wait flag and poll attempt belong
+    to this invocation, which may be frozen and over by the time the refresh runs.
+    
+    Returns:
+        Tuple of the scraper result, cache status (HIT, STALE or MISS) and cached age in seconds
+    """
+    ttl, stale_ttl = RESULT_CACHE_TTLS[action]
+    return result_cache.get_or_compute(
+        f'{action}:{track_id}',
+        lambda: run_track_action(action, track_id, **options),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+        is_cacheable=is_cacheable_result,
+        refresh=lambda: run_track_action(action, track_id)
+    )
+
+def is_cacheable_result(result: Dict[str, Any]) -> bool:
+    """Complete results only: not failed, and neither the result nor its chart still processing"""
+    if is_failed_result(result) or is_processing_result(result):
+        return False
+    chart = result.get('chart_data')
+    return not (isinstance(chart, dict) and chart.get('api_status') == 'processing')
+
+def compact_result(action: str, result: Any) -> Any:
+    """
+    Delta-encode the chart time series in a per-track result for format=compact
+    
+    Cached results stay in the full format; only the response is compacted.
+    """
+    if action not in TIME_SERIES_ACTIONS or not isinstance(result, dict):
+        return result
+    
+    from timeseries import compact_chart_data, compact_streaming_data
+    
+    compact = compact_chart_data(result)
+    if isinstance(compact.get('streaming_data'), dict):
+        compact['streaming_data'] = compact_streaming_data(compact['streaming_data'])
+    return compact
+
+def run_batch(action: str, track_ids: List[str], deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Fan a per-track action out over a bounded thread pool
+    
+    kworb batches use at most KWORB_BATCH_WORKERS threads, the others MAX_BATCH_WORKERS;
+    every request is still paced per host by the scrapers' rate limiters.
+    
+    Args:
+        action: One of BATCH_ACTIONS
+        track_ids: Spotify track IDs, at most MAX_BATCH_SIZE
+        deadline: time.monotonic() value by which chart polling must stop
+        
+    Returns:
+        Dictionary with per-track results in request order
+    """
+    options = {'deadline': deadline} if action == 'chart_data' else {}
+    
+    def scrape_one(track_id: str) -> Dict[str, Any]:
+        try:
+            result, cache_status, _ = get_track_result(action, track_id, **options)
+        except Exception as e:
+            logger.error(f"Batch {action} failed for track {track_id}: {str(e)}", exc_info=True)
+            return {'track_id': track_id, 'success': False, 'error': str(e)}
+        
+        if is_processing_result(result):
+            result = processing_error(result)
+        
+        entry = {'track_id': track_id, 'success': not is_failed_result(result), 'cache': cache_status, 'data': result}
+        if not entry['success']:
+            entry['error'] = result.get('error', 'Unknown error')
+        return entry
+    
+    workers = min(KWORB_BATCH_WORKERS if action == 'kworb' else MAX_BATCH_WORKERS, len(track_ids))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scrape_one, track_ids))
+    
+    errors = {entry['track_id']: entry['error'] for entry in results if not entry['success']}
+    
+    return {
+        'success': True,
+        'batch_action': action,
+        'count': len(results),
+        'succeeded': len(results) - len(errors),
+        'failed': len(errors),
+        'results': results,
+        'errors': errors
+    }
+
+def chart_from_stream_count(track_id: str, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The chart_data result for a track, built from the chart scrape_track already fetched
+    
+    Returns:
+        The chart_data result, or None when the stream count result has no ready chart
+    """
+    chart = result.get('chart_data') if result else None
+    if not (isinstance(chart, dict) and chart.get('api_status') == 'ready'):
+        return None
+    return {
+        'track_id': track_id,
+        'status': 'success',
+        'chart_data': chart.get('chart_data'),
+        'retrieved_at': result.get('scraped_at')
+    }
+
+def run_full(track_id: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run the kworb scrape, MyStreamCount scrape and chart poll for one track
+    
+    kworb runs alongside the MyStreamCount scrape. scrape_track already fetches the
+    chart, so the chart is taken from its result; the chart is only polled when it
+    was still processing, after scrape_track has cached the page's CSRF token. A cold
+    cache costs MyStreamCount one page GET and one streams POST, as stream_count does.
+    
+    Args:
+        track_id: Spotify track ID
+        deadline: time.monotonic() value by which chart polling must stop
+        
+    Returns:
+        Dictionary with each action's result under its own key
+    """
+    def run_part(action: str) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+        try:
+            options = {'deadline': deadline} if action == 'chart_data' else {}
+            result, cache_status, _ = get_track_result(action, track_id, **options)
+        except Exception as e:
+            logger.error(f"Full {action} failed for track {track_id}: {str(e)}", exc_info=True)
+            return None, None, str(e)
+        
+        if is_processing_result(result):
+            result = processing_error(result)
+        
+        error = result.get('error', 'Unknown error') if is_failed_result(result) else None
+        return result, cache_status, error
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        kworb = executor.submit(run_part, 'kworb')
+        parts = {'stream_count': run_part('stream_count')}
+        
+        stream_count, cache_status, error = parts['stream_count']
+        chart = chart_from_stream_count(track_id, stream_count)
+        if chart:
+            parts['chart_data'] = (chart, cache_status, None)
+        elif error:
+            # Polling the upstream that just failed the scrape would only repeat the failure
+            parts['chart_data'] = (None, None, f'stream_count failed: {error}')
+        else:
+            parts['chart_data'] = run_part('chart_data')
+        
+        parts['kworb'] = kworb.result()
+    
+    response = {'track_id': track_id}
+    cache = {}
+    errors = {}
+    for action in FULL_ACTIONS:
+        result, cache_status, error = parts[action]
+        response[action] = result
+        if cache_status:
+            cache[action] = cache_status
+        if error:
+            errors[action] = error
+    
+    response['success'] = len(errors) < len(FULL_ACTIONS)
+    response['cache'] = cache
+    response['errors'] = errors
+    return response
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda handler for web scraping operations
@@ -79,17 +600,31 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Extract query parameters from Lambda Function URL
         query_params = event.get('queryStringParameters', {}) or {}
-        action = query_params.get('action', '').lower()
+        body = parse_body(event) if http_method == 'POST' else {}
+        action = (query_params.get('action') or body.get('action') or '').lower()
         
         logger.info(f"Action requested: {action}")
         
+        response_format = (query_params.get('format') or body.get('format') or 'full').lower()
+        if response_format not in RESPONSE_FORMATS:
+            return create_response(400, {
+                'success': False,
+                'error': f'format must be one of: {", ".join(RESPONSE_FORMATS)}'
+            })
+        compact = response_format == 'compact'
+        
         # Health check endpoint
         if action == 'health' or not action:
             return create_response(200, {
                 'status': 'healthy',
                 'service': 'songstats-lambda-scraper',
                 'version': '1.0.0',
-                'available_actions': ['health', 'stream_count', 'kworb', 'chart_data']
+                'available_actions': AVAILABLE_ACTIONS,
+                'warm_scrapers': scraper_pool.status(),
+                'http_cache': module_stats('http_cache', 'validator_store'),
+                'parsed_cache': module_stats('parsed_cache', 'parsed_cache'),
+                'decoding': module_stats('html_parsers', 'decode_stats'),
+                'detected_encodings': module_stats('charset_detection', 'encoding_memo')
             })
         
         # Stream count scraping
@@ -102,33 +637,69 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 })
             
             logger.info(f"Scraping stream count for track: {track_id}")
-            scraper = MyStreamCountJSONScraper(delay=0.5)
-            result = scraper.scrape_track(track_id)
+            result, cache_status, cache_age = get_track_result('stream_count', track_id)
+            if compact:
+                result = compact_result('stream_count', result)
             
             return create_response(200, {
                 'success': True,
                 'track_id': track_id,
                 'data': result
-            })
+            }, cache_status=cache_status, cache_age=cache_age)
         
         # Chart data only
         elif action == 'chart_data':
             track_id = query_params.get('track_id')
+            attempt = 0
+            
+            # Clients re-poll a processing track with the token from the 202 response
+            poll_token = query_params.get('poll_token') or body.get('poll_token')
+            if poll_token:
+                try:
+                    track_id, attempt = decode_poll_token(poll_token)
+                except ValueError as e:
+                    return create_response(400, {
+                        'success': False,
+                        'error': str(e)
+                    })
+            
             if not track_id:
                 return create_response(400, {
                     'success': False,
                     'error': 'track_id parameter is required'
                 })
             
+            # wait=false returns 202 on the first processing poll instead of backing off,
+            # and so does any poll that ran out of time when resumed with a poll_token
+            wait = parse_flag(query_params.get('wait', body.get('wait')))
+            
             logger.info(f"Scraping chart data for track: {track_id}")
-            scraper = MyStreamCountJSONScraper(delay=0.5)
-            result = scraper.get_chart_data_only(track_id)
+            result, cache_status, cache_age = get_track_result(
+                'chart_data', track_id, deadline=get_deadline(context), wait=wait, attempt=attempt
+            )
+            
+            # Only callers that opted into polling get 202s; the default keeps the
+            # 200 / chart_data error shape existing clients read
+            if is_processing_result(result) and wait and not poll_token:
+                result = processing_error(result)
+            
+            if is_processing_result(result):
+                return create_response(202, {
+                    'success': True,
+                    'track_id': track_id,
+                    'status': 'processing',
+                    'poll_token': encode_poll_token(track_id, result['attempt']),
+                    'retry_after': result['retry_after']
+                }, cache_status=cache_status, retry_after=result['retry_after'])
+            
+            if compact:
+                result = compact_result('chart_data', result)
             
             return create_response(200, {
                 'success': True,
                 'track_id': track_id,
                 'chart_data': result
-            })
+            }, cache_status=cache_status, cache_age=cache_age)
         
         # Kworb country data
         elif action == 'kworb':
@@ -141,21 +712,73 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 })
             
             logger.info(f"Scraping Kworb data for track ID: {track_id}")
-            scraper = KworbScraper(delay=0.5)
-            result = scraper.get_top_streaming_country(track_id)
+            result, cache_status, cache_age = get_track_result('kworb', track_id)
             
             return create_response(200, {
                 'success': True,
                 'track_id': track_id,
                 'data': result
-            })
+            }, cache_status=cache_status, cache_age=cache_age)
+        
+        # Everything the song page needs in one invocation
+        elif action == 'full':
+            track_id = query_params.get('track_id') or body.get('track_id')
+            if not track_id:
+                return create_response(400, {
+                    'success': False,
+                    'error': 'track_id parameter is required'
+                })
+            
+            logger.info(f"Scraping kworb, stream count and chart data for track: {track_id}")
+            response = run_full(track_id, deadline=get_deadline(context))
+            if compact:
+                for part in TIME_SERIES_ACTIONS:
+                    response[part] = compact_result(part, response[part])
+            return create_response(200, response)
+        
+        # Many tracks in one invocation
+        elif action == 'batch':
+            batch_action = (query_params.get('batch_action') or body.get('batch_action') or '').lower()
+            if batch_action not in BATCH_ACTIONS:
+                return create_response(400, {
+                    'success': False,
+                    'error': f'batch_action must be one of: {", ".join(BATCH_ACTIONS)}'
+                })
+            
+            try:
+                track_ids = parse_track_ids(query_params.get('track_ids') or body.get('track_ids'))
+            except ValueError as e:
+                return create_response(400, {
+                    'success': False,
+                    'error': str(e)
+                })
+            
+            if not track_ids:
+                return create_response(400, {
+                    'success': False,
+                    'error': 'track_ids parameter is required'
+                })
+            
+            if len(track_ids) > MAX_BATCH_SIZE:
+                return create_response(400, {
+                    'success': False,
+                    'error': f'At most {MAX_BATCH_SIZE} track_ids are allowed per batch'
+                })
+            
+            logger.info(f"Running batch {batch_action} for {len(track_ids)} tracks")
+            response = run_batch(batch_action, track_ids, deadline=get_deadline(context))
+            if compact:
+                for entry in response['results']:
+                    if 'data' in entry:
+                        entry['data'] = compact_result(batch_action, entry['data'])
+            return create_response(200, response)
         
         # Unknown action
         else:
             return create_response(400, {
                 'success': False,
                 'error': f'Unknown action: {action}',
-                'available_actions': ['health', 'stream_count', 'kworb', 'chart_data']
+                'available_actions': AVAILABLE_ACTIONS
             })
             
     except Exception as e:
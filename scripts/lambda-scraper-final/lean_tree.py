@@ -0,0 +1,131 @@
+import os
+import sys
+from typing import Any, Dict
+
+from bs4 import BeautifulSoup
+from bs4.element import CData, NavigableString, PageElement, Tag
+
+from soup_index import IndexedTag
+
+# Lean tree mode: BeautifulSoup options that build the same tree with less memory per node,
+# for long kworb history tables where peak RSS, not CPU, limits a 512MB Lambda.
+#
+# bs4's PageElement, NavigableString and Tag declare no __slots__, and that cannot be
+# changed without forking the vendored bs4, so every subclass still has a __dict__ slot.
+# CPython only allocates the dict itself when an attribute outside the slots is first set,
+# so subclasses declaring slots for every attribute bs4 sets never fill it. LeanSoup makes
+# the tree builder create them:
+#
+# - LeanString keeps its tree links in slots and never allocates a dict. Strings are half
+#   of a kworb tree's nodes and their dicts are most of what a plain NavigableString weighs.
+# - LeanTag likewise never allocates its dict, interns tag names and attribute keys (one
+#   'td' object instead of one per cell) and shares one empty namespace mapping.
+# - store_line_numbers=False drops sourceline/sourcepos, which nothing here reads.
+#
+# Slots bs4 does not always set get defaults, since an unset one would not raise but fall
+# through to Tag.__getattr__ and be looked up as a child tag.
+#
+# The slotted classes make parsing slower (see benchmarks/bench_tree_memory.py): their
+# __init__ overrides and interning run once per node, which costs about half again the
+# parse time of a full 365-day kworb page. Lean trees are therefore opt-in, with
+# SCRAPER_LEAN_TREE=1, for deployments whose memory rather than duration is the limit.
+# The default strained kworb parse builds only the country table and gains little.
+
+LEAN_TREE = os.environ.get('SCRAPER_LEAN_TREE', '0') == '1'
+
+NODE_SLOTS = ('parent', 'previous_element', 'next_element', 'previous_sibling', 'next_sibling', '_decomposed')
+TAG_SLOTS = NODE_SLOTS + (
+    'parser_class', 'name', 'namespace', '_namespaces', 'prefix', 'sourceline', 'sourcepos', 'known_xml',
+    'attrs', 'contents', 'hidden', 'can_be_empty_element', 'cdata_list_attributes', 'preserve_whitespace_tags',
+    'interesting_string_types', '_index_position'
+)
+
+# Tag.__init__ gives every tag its own empty dict; HTML documents never add to it
+NO_NAMESPACES: Dict[str, str] = {}
+
+def _intern(value: Any) -> Any:
+    # sys.intern rejects str subclasses such as bs4's NamespacedAttribute
+    return sys.intern(value) if type(value) is str else value
+
+def _decompose(element: PageElement) -> None:
+    """PageElement.decompose for trees holding slotted nodes, whose slots a __dict__.clear() misses"""
+    element.extract()
+    while element is not None:
+        following = element.next_element
+        slots = TAG_SLOTS if isinstance(element, LeanTag) else NODE_SLOTS if isinstance(element, LeanString) else ()
+        for slot in slots:
+            try:
+                delattr(element, slot)
+            except AttributeError:
+                pass
+        if hasattr(element, '__dict__'):
+            element.__dict__.clear()
+        if isinstance(element, Tag):
+            element.contents = []
+        element._decomposed = True
+        element = following
+
+class LeanString(NavigableString):
+    __slots__ = NODE_SLOTS
+
+    def __new__(cls, value):
+        string = super().__new__(cls, value)
+        string._decomposed = False
+        return string
+
+    def _all_strings(self, strip=False, types=PageElement.default):
+        # NavigableString's default only lists the base classes, which would hide this one
+        if types is self.default:
+            types = LeanTag.DEFAULT_INTERESTING_STRING_TYPES
+        return super()._all_strings(strip, types)
+
+    def decompose(self):
+        _decompose(self)
+
+class LeanTag(IndexedTag, Tag):
+    __slots__ = TAG_SLOTS
+
+    DEFAULT_INTERESTING_STRING_TYPES = (NavigableString, LeanString, CData)
+
+    def __init__(self, *args, **kwargs):
+        # Tag.__init__ leaves these unset without line numbers or an index
+        self._decomposed = False
+        self.sourceline = None
+        self.sourcepos = None
+        self._index_position = None
+        super().__init__(*args, **kwargs)
+        self.name = _intern(self.name)
+        if self.attrs:
+            self.attrs = {_intern(key): value for key, value in self.attrs.items()}
+        if not self._namespaces:
+            self._namespaces = NO_NAMESPACES
+
+    def decompose(self):
+        _decompose(self)
+
+class LeanSoup(IndexedTag, BeautifulSoup):
+    """
+    BeautifulSoup building its tree from LeanTag and LeanString, without line numbers
+
+    Takes the same arguments as BeautifulSoup; store_line_numbers and element_classes
+    can still be overridden. Strings are swapped in by string_container rather than
+    element_classes, which would also replace the Script and Stylesheet containers
+    that keep script and style text out of get_text().
+
+    With indexed, simple find_all/find/select/select_one queries on the document and
+    its tags are answered from a soup_index.DocumentIndex built on first use.
+    """
+
+    DEFAULT_INTERESTING_STRING_TYPES = LeanTag.DEFAULT_INTERESTING_STRING_TYPES
+
+    def __init__(self, markup='', features=None, indexed: bool = False, **kwargs):
+        # Set before parsing, which may already extract and insert elements
+        self.indexed = indexed
+        self._index = None
+        kwargs.setdefault('store_line_numbers', False)
+        kwargs.setdefault('element_classes', {Tag: LeanTag})
+        super().__init__(markup, features, **kwargs)
+
+    def string_container(self, base_class=None):
+        container = super().string_container(base_class)
+        return LeanString if container is NavigableString else container
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from extraction_specs import SCRIPT_PATTERN
+
+class PageScripts:
+    def __init__(self):
+        """
+        What a MyStreamCount track page's inline scripts tell us
+
+        Attributes:
+            api_url: Streams API URL from the last loadStreams script
+            stream_token: CSRF token from the last loadStreams script
+            csrf_token: First CSRF token passed to an API call in any script
+            total: Raw cumulative values pushed in the createGraph script
+            daily: Raw daily values pushed in the createGraph script
+        """
+        self.api_url: Optional[str] = None
+        self.stream_token: Optional[str] = None
+        self.csrf_token: Optional[str] = None
+        self.total: List[str] = []
+        self.daily: List[str] = []
+
+    def streaming_data(self) -> Dict:
+        """The dictionary MyStreamCountJSONScraper reports as streaming_data"""
+        streaming_data = {}
+        if self.api_url:
+            streaming_data['api_url'] = self.api_url
+        if self.stream_token:
+            streaming_data['csrf_token'] = self.stream_token
+        if self.total:
+            streaming_data['sample_total_data'] = self.total
+        if self.daily:
+            streaming_data['sample_daily_data'] = self.daily
+        return streaming_data
+
+def analyze_scripts(soup: BeautifulSoup) -> PageScripts:
+    """
+    Walk a page's inline scripts once and collect the API URL, CSRF token and chart series
+
+    Only loadStreams scripts are trusted for the API URL and their token and only
+    createGraph scripts for chart series, matching what the page itself runs. When
+    several scripts qualify, the last one with a match wins.
+    """
+    scripts = PageScripts()
+
+    for script in soup.find_all('script'):
+        text = script.string
+        if not text:
+            continue
+
+        loads_streams = 'loadStreams' in text
+        creates_graph = 'createGraph' in text
+        if not loads_streams and not creates_graph and '_token:' not in text:
+            continue
+
+        url = token = None
+        total, daily = [], []
+        for match in SCRIPT_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'url':
+                if url is None:
+                    url = match.group('url')
+            elif kind == 'token':
+                if token is None:
+                    token = match.group('token')
+            elif creates_graph:
+                series = total if match.group('series') == 'total' else daily
+                series.append(match.group('value'))
+
+        if scripts.csrf_token is None:
+            scripts.csrf_token = token
+        if loads_streams:
+            scripts.api_url = url or scripts.api_url
+            scripts.stream_token = token or scripts.stream_token
+        scripts.total = total or scripts.total
+        scripts.daily = daily or scripts.daily
+
+    return scripts
@@ -0,0 +1,189 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Part of every key and saved file. Bump it with every change to extraction logic (the
+# extractors, extraction_specs, the selectors or the parse they read), whether or not the
+# output was meant to change, so entries extracted by older code are ignored.
+PARSED_CACHE_VERSION = 4
+
+class ParsedResultCache:
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, path: Optional[str] = None,
+                 save_every: int = 50, save_interval: float = 30.0):
+        """
+        Content-addressed cache of extraction results
+
+        Maps a hash of a response body to what the extractors produced from it, so a page
+        whose bytes did not change skips BeautifulSoup construction and extraction. Values
+        are held as JSON text, which bounds the cache by bytes and hands every caller its
+        own copy.
+
+        Args:
+            max_bytes: Total size of stored values before the least recently used are dropped
+            path: JSON file loaded now, rewritten on exit and periodically while running,
+                so it mostly survives Lambda containers that are frozen and discarded
+                without exiting
+            save_every: New entries after which the file is rewritten
+            save_interval: Seconds after which any new entries get the file rewritten
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+
+        if path:
+            if os.path.exists(path):
+                self.load(path)
+            atexit.register(self._save_quietly)
+
+    def key(self, namespace: str, content: bytes) -> str:
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        return f'{namespace}:{PARSED_CACHE_VERSION}:{digest}'
+
+    def get_or_extract(self, namespace: str, content: bytes, extract: Callable[[], Any]) -> Any:
+        """
+        Return the cached extraction for content, running extract on a miss
+
+        Args:
+            namespace: Which extractor produced the value, e.g. 'kworb'
+            content: Raw response body the value is derived from
+            extract: Produces the value; must be JSON serializable
+
+        Returns:
+            The extracted value
+        """
+        key = self.key(namespace, content)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if text is not None:
+            return json.loads(text)
+
+        value = extract()
+        self._store(key, json.dumps(value, default=str))
+        if self.path and self._save_due():
+            self._save_quietly(blocking=False)
+        return value
+
+    def _save_due(self) -> bool:
+        with self._lock:
+            return self._unsaved >= self.save_every or (
+                self._unsaved and time.monotonic() - self._saved_at >= self.save_interval
+            )
+
+    def _save_quietly(self, blocking: bool = True) -> None:
+        # Worker threads skip the save while another thread is writing instead of queueing
+        # behind it; whatever they added goes out with the next save
+        if not self._save_lock.acquire(blocking=blocking):
+            return
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Parsed result cache not saved to {self.path}: {e}")
+        finally:
+            self._save_lock.release()
+
+    def _store(self, key: str, text: str) -> None:
+        if len(text) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = text
+            self.size += len(text)
+            while self.size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self.size -= len(dropped)
+            self._dirty = True
+            self._unsaved += 1
+
+    def stats(self) -> Dict:
+        """Hit rate and size, for the health endpoint and benchmarks"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'kb': round(self.size / 1024, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+    def load(self, path: str) -> None:
+        """Add the entries saved at path, ignoring files written by another cache version"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Parsed result cache not loaded from {path}: {e}")
+            return
+
+        if saved.get('version') != PARSED_CACHE_VERSION:
+            return
+
+        # Saved least recently used first, so replaying keeps the LRU order
+        for key, text in saved.get('entries', []):
+            self._store(key, text)
+        self._dirty = False
+        self._unsaved = 0
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the entries to path (default: the path given at construction) if anything changed"""
+        # One writer at a time, since every writer shares the temporary file
+        with self._save_lock:
+            self._save(path)
+
+    def _save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path or not self._dirty:
+            return
+
+        with self._lock:
+            entries = list(self._entries.items())
+            self._dirty = False
+            self._unsaved = 0
+            self._saved_at = time.monotonic()
+
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PARSED_CACHE_VERSION, 'entries': entries}, f)
+        os.replace(temp_path, path)
+
+def build_parsed_cache() -> ParsedResultCache:
+    """
+    Sized by PARSED_CACHE_MAX_BYTES and persisted to PARSED_CACHE_PATH when set, every
+    PARSED_CACHE_SAVE_EVERY new entries or PARSED_CACHE_SAVE_INTERVAL seconds
+    """
+    return ParsedResultCache(
+        max_bytes=int(os.environ.get('PARSED_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+        path=os.environ.get('PARSED_CACHE_PATH'),
+        save_every=int(os.environ.get('PARSED_CACHE_SAVE_EVERY', '50')),
+        save_interval=float(os.environ.get('PARSED_CACHE_SAVE_INTERVAL', '30'))
+    )
+
+# Module scope so warm Lambda containers and every scraper instance share it
+parsed_cache = build_parsed_cache()
@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Thread-safe token bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens the bucket holds (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until the requested tokens are available and take them
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+
+                wait_time = (tokens - self._tokens) / self.rate
+
+            # Sleep outside the lock so other threads can refill-check meanwhile
+            time.sleep(wait_time)
+            waited += wait_time
+
+class HostRateLimiter:
+    def __init__(self, rate: Optional[float], capacity: float = 1.0):
+        """
+        Keep one token bucket per host
+
+        Args:
+            rate: Requests per second allowed per host, None disables limiting
+            capacity: Burst size per host
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> float:
+        """
+        Block until a request to the URL's host is allowed
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.rate:
+            return 0.0
+
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+
+        return bucket.acquire()
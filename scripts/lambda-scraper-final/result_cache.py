@@ -0,0 +1,184 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MemoryCache:
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """
+        In-process LRU tier, kept alive by warm Lambda containers
+
+        Values are held as JSON text, which is both what the size bound counts and several
+        times smaller than the decoded objects: a multi-year chart result is about 100 KB
+        of JSON but over 600 KB as Python lists and dicts. Every get decodes a fresh copy.
+
+        Args:
+            max_bytes: Total JSON size kept before the least recently used entries are dropped
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return dict(entry, value=json.loads(entry['value']))
+
+    def set(self, key: str, entry: Dict) -> None:
+        stored = dict(entry, value=json.dumps(entry['value'], default=str))
+        with self._lock:
+            self._discard(key)
+            if len(stored['value']) > self.max_bytes:
+                return
+            self._entries[key] = stored
+            self.size += len(stored['value'])
+            while self.size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self.size -= len(dropped['value'])
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry['value'])
+
+class SQLiteCache:
+    def __init__(self, path: str):
+        """
+        Persistent tier backed by a local SQLite file
+
+        Args:
+            path: Database file, created if missing
+        """
+        # Imported here so containers without a persistent tier skip loading sqlite3
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, stored_at, expires_at FROM results WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'value': json.loads(row[0]), 'stored_at': row[1], 'expires_at': row[2]}
+
+    def set(self, key: str, entry: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(entry['value'], default=str), entry['stored_at'], entry['expires_at'])
+            )
+            self._conn.execute('DELETE FROM results WHERE expires_at < ?', (time.time(),))
+            self._conn.commit()
+
+class ResultCache:
+    def __init__(self, tiers: List[Any]):
+        """
+        Tiered result cache with TTL and stale-while-revalidate semantics
+
+        Fresh entries are served as HIT. Entries past their TTL but within their stale
+        window are served as STALE while a background thread recomputes them. Anything
+        older is recomputed inline as a MISS. Note that Lambda freezes background threads
+        once a response is returned, so a refresh may finish on the next invocation.
+
+        Args:
+            tiers: Cache tiers ordered fastest first, each with get(key) and set(key, entry)
+        """
+        self.tiers = tiers
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float, stale_ttl: float = 0,
+                       is_cacheable: Callable[[Any], bool] = lambda value: True,
+                       refresh: Optional[Callable[[], Any]] = None) -> Tuple[Any, str, Optional[int]]:
+        """
+        Return the cached value for key, computing it when missing or expired
+
+        Args:
+            key: Cache key
+            compute: Produces a fresh value for this caller
+            ttl: Seconds a value is served as fresh
+            stale_ttl: Further seconds a value is served while being revalidated
+            is_cacheable: Values failing this check are returned but not stored
+            refresh: Produces a fresh value in the background for a STALE hit, compute by
+                default. It may run after the caller's invocation has ended, so it should
+                not depend on that invocation's deadline or polling state.
+
+        Returns:
+            Tuple of value, cache status (HIT, STALE or MISS) and the cached value's age in seconds
+        """
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None:
+            age = now - entry['stored_at']
+            if age < ttl:
+                return entry['value'], 'HIT', int(age)
+            if age < ttl + stale_ttl:
+                self._refresh_in_background(key, refresh or compute, ttl, stale_ttl, is_cacheable)
+                return entry['value'], 'STALE', int(age)
+
+        value = compute()
+        if is_cacheable(value):
+            self._store(key, value, ttl, stale_ttl)
+        return value, 'MISS', None
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        for i, tier in enumerate(self.tiers):
+            try:
+                entry = tier.get(key)
+            except Exception as e:
+                logger.warning(f"Result cache read failed for {key}: {e}")
+                continue
+
+            if entry is not None:
+                # Promote to the faster tiers
+                for faster in self.tiers[:i]:
+                    faster.set(key, entry)
+                return entry
+        return None
+
+    def _store(self, key: str, value: Any, ttl: float, stale_ttl: float) -> None:
+        now = time.time()
+        entry = {'value': value, 'stored_at': now, 'expires_at': now + ttl + stale_ttl}
+        for tier in self.tiers:
+            try:
+                tier.set(key, entry)
+            except Exception as e:
+                logger.warning(f"Result cache write failed for {key}: {e}")
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any], ttl: float, stale_ttl: float,
+                               is_cacheable: Callable[[Any], bool]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                value = compute()
+                if is_cacheable(value):
+                    self._store(key, value, ttl, stale_ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
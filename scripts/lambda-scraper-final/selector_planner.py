@@ -0,0 +1,151 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bs4.element import Tag
+
+# Selectors the planner matches natively: compounds of tag name, id and classes joined by
+# descendant (' ') or child ('>') combinators, e.g. 'p.text-md.text-gray-500.font-medium.mt-1 a'.
+# Anything else (selector lists, sibling combinators, attributes, pseudo-classes, escapes)
+# is left to soupsieve.
+IDENTIFIER = r'-?[A-Za-z_][\w-]*'
+COMPOUND_PATTERN = re.compile(rf'(?P<name>{IDENTIFIER}|\*)?(?P<id>#{IDENTIFIER})?(?P<classes>(?:\.{IDENTIFIER})*)')
+COMBINATOR_PATTERN = re.compile(r'\s*(>)\s*|\s+')
+
+# (tag names or None for any, id or None, classes), as looked up in a soup_index.DocumentIndex
+Query = Tuple[Optional[Tuple[str, ...]], Optional[str], Tuple[str, ...]]
+
+def tag_classes(tag: Tag) -> Sequence[str]:
+    classes = tag.attrs.get('class') or ()
+    return classes.split() if isinstance(classes, str) else classes
+
+class Compound:
+    __slots__ = ('name', 'id', 'classes')
+
+    def __init__(self, name: Optional[str], tag_id: Optional[str], classes: Tuple[str, ...]):
+        """
+        One compound selector, checked cheapest first: tag name, id, then classes in order
+
+        Args:
+            name: Lowercase tag name, None for any
+            tag_id: Required id, or None
+            classes: Required classes
+        """
+        self.name = name
+        self.id = tag_id
+        self.classes = classes
+
+    @property
+    def query(self) -> Query:
+        return (self.name,) if self.name else None, self.id, self.classes
+
+    def matches(self, tag: Tag) -> bool:
+        # Tag names compare case-insensitively in HTML; parsers already lowercase them
+        if self.name is not None and tag.name != self.name and tag.name.lower() != self.name:
+            return False
+        if self.id is not None and tag.attrs.get('id') != self.id:
+            return False
+        if self.classes:
+            present = tag_classes(tag)
+            for name in self.classes:
+                if name not in present:
+                    return False
+        return True
+
+class SelectorPlan:
+    def __init__(self, compounds: List[Compound], combinators: List[str]):
+        """
+        A selector compiled into checks that run without soupsieve's per-match state
+
+        An element is tested against the last (subject) compound first, which rejects
+        nearly every element with a name or class comparison. Only then are its ancestors
+        walked, right to left, to satisfy the remaining compounds, backtracking over
+        ancestors where a child combinator makes the nearest match the wrong one.
+
+        Args:
+            compounds: Compounds left to right
+            combinators: ' ' or '>' between each pair of compounds
+        """
+        self.compounds = compounds
+        self.combinators = combinators
+        self.subject = compounds[-1]
+
+    def by_rarity(self, count: Callable[[str], int]) -> 'SelectorPlan':
+        """The same plan with every compound's classes checked least common first"""
+        return SelectorPlan(
+            [Compound(compound.name, compound.id, tuple(sorted(compound.classes, key=count)))
+             for compound in self.compounds],
+            self.combinators
+        )
+
+    def matches(self, tag: Tag) -> bool:
+        """Whether tag matches the whole selector, like soupsieve's match()"""
+        return self.subject.matches(tag) and self.matches_context(tag)
+
+    def matches_context(self, tag: Tag, position: Optional[int] = None) -> bool:
+        """Whether the ancestors of tag, which matched compound position, satisfy the compounds before it"""
+        if position is None:
+            position = len(self.compounds) - 1
+        if position == 0:
+            return True
+
+        compound = self.compounds[position - 1]
+        ancestor = tag.parent
+        # Like soupsieve, the BeautifulSoup object is an ancestor too: a nameless element
+        # without attributes, which only a bare * matches
+        while ancestor is not None:
+            if compound.matches(ancestor) and self.matches_context(ancestor, position - 1):
+                return True
+            if self.combinators[position - 1] == '>':
+                return False
+            ancestor = ancestor.parent
+        return False
+
+    def select(self, scope: Tag, limit: Optional[int] = None) -> List[Tag]:
+        """Descendants of scope matching the selector in document order, stopping at limit"""
+        found = []
+        for element in scope.descendants:
+            if isinstance(element, Tag) and self.subject.matches(element) and self.matches_context(element):
+                found.append(element)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+def _parse(selector: str) -> Optional[SelectorPlan]:
+    compounds = []
+    combinators = []
+    position = 0
+    selector = selector.strip()
+    while True:
+        match = COMPOUND_PATTERN.match(selector, position)
+        if not match.group(0):
+            return None
+        name = match.group('name')
+        compounds.append(Compound(
+            name.lower() if name and name != '*' else None,
+            match.group('id')[1:] if match.group('id') else None,
+            tuple(match.group('classes').split('.')[1:])
+        ))
+        position = match.end()
+        if position == len(selector):
+            return SelectorPlan(compounds, combinators)
+
+        combinator = COMBINATOR_PATTERN.match(selector, position)
+        if not combinator:
+            return None
+        combinators.append('>' if combinator.group(1) else ' ')
+        position = combinator.end()
+
+_plans: Dict[str, Optional[SelectorPlan]] = {}
+
+def selector_plan(selector: str) -> Optional[SelectorPlan]:
+    """
+    Plan for a CSS selector, cached per selector string
+
+    Returns:
+        The plan, or None when the selector needs soupsieve
+    """
+    if not isinstance(selector, str):
+        return None
+    if selector not in _plans:
+        _plans[selector] = _parse(selector)
+    return _plans[selector]
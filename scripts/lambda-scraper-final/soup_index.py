@@ -0,0 +1,272 @@
+from bisect import bisect_left
+from heapq import merge
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.element import ResultSet, SoupStrainer, Tag
+
+from selector_planner import Query, SelectorPlan, selector_plan, tag_classes
+
+EMPTY: List[int] = []
+
+class DocumentIndex:
+    def __init__(self, root: Tag):
+        """
+        Tags of one document by name, id and class, in document order
+
+        Each tag is numbered by its position in the document, so the tags under any
+        element are the ones numbered between it and its last descendant tag, and a
+        scoped lookup is two bisections into a list instead of a walk over the subtree.
+
+        Args:
+            root: The BeautifulSoup object; its descendants are indexed
+        """
+        self.tags: List[Tag] = []
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_id: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        self._plans: Dict[int, SelectorPlan] = {}
+        # Selector tag names are matched case-insensitively, which only the
+        # lowercase names the parsers produce can be looked up by
+        self.lowercase_names = True
+
+        tags, by_name, by_id, by_class = self.tags, self.by_name, self.by_id, self.by_class
+        for element in root.descendants:
+            if not isinstance(element, Tag):
+                continue
+            position = len(tags)
+            element._index_position = position
+            tags.append(element)
+
+            name = element.name
+            if name in by_name:
+                by_name[name].append(position)
+            else:
+                by_name[name] = [position]
+                if name != name.lower():
+                    self.lowercase_names = False
+
+            attrs = element.attrs
+            if attrs:
+                tag_id = attrs.get('id')
+                if isinstance(tag_id, str):
+                    by_id.setdefault(tag_id, []).append(position)
+                classes = attrs.get('class')
+                if classes:
+                    for class_name in classes.split() if isinstance(classes, str) else classes:
+                        by_class.setdefault(class_name, []).append(position)
+
+    def bounds(self, scope: Tag) -> Tuple[int, int]:
+        """Positions [start, end) of the tags below scope"""
+        if scope.parent is None:
+            return 0, len(self.tags)
+
+        last = scope._last_descendant()
+        while last is not scope and not isinstance(last, Tag):
+            last = last.previous_element
+        start = scope._index_position + 1
+        return start, (last._index_position + 1 if last is not scope else start)
+
+    def plan(self, plan: SelectorPlan) -> SelectorPlan:
+        """plan with its classes checked in this document's rarest-first order"""
+        key = id(plan)
+        if key not in self._plans:
+            self._plans[key] = plan.by_rarity(lambda name: len(self.by_class.get(name, EMPTY)))
+        return self._plans[key]
+
+    def find(self, scope: Tag, query: Query, limit: Optional[int] = None,
+             accept: Optional[Callable[[Tag], bool]] = None) -> List[Tag]:
+        """
+        Tags below scope matching every part of query, in document order
+
+        Candidates come from whichever of the name, id and class lists has the fewest
+        entries in scope; the rest of the query, then accept, is checked on each
+        candidate until limit tags are found.
+        """
+        names, tag_id, classes = query
+        start, end = self.bounds(scope)
+
+        options = []
+        if tag_id is not None:
+            options.append([self.by_id.get(tag_id, EMPTY)])
+        for name in classes:
+            options.append([self.by_class.get(name, EMPTY)])
+        if names is not None:
+            options.append([self.by_name.get(name, EMPTY) for name in set(names)])
+
+        if options:
+            slices = []
+            for lists in options:
+                ranges = [(positions, bisect_left(positions, start), bisect_left(positions, end))
+                          for positions in lists]
+                slices.append((sum(high - low for _, low, high in ranges), ranges))
+            _, ranges = min(slices, key=lambda item: item[0])
+            if len(ranges) == 1:
+                positions, low, high = ranges[0]
+                candidates = positions[low:high]
+            else:
+                candidates = merge(*(positions[low:high] for positions, low, high in ranges))
+        else:
+            candidates = range(start, end)
+
+        found = []
+        for position in candidates:
+            tag = self.tags[position]
+            if names is not None and tag.name not in names:
+                continue
+            if tag_id is not None and tag.get('id') != tag_id:
+                continue
+            if classes and not set(classes).issubset(tag_classes(tag)):
+                continue
+            if accept is not None and not accept(tag):
+                continue
+            found.append(tag)
+            if limit and len(found) >= limit:
+                break
+        return found
+
+def find_all_query(name, attrs, kwargs) -> Optional[Query]:
+    """
+    The index query equivalent to find_all's name, attrs and keyword filters
+
+    Returns:
+        The query, or None when the filters need SoupStrainer, e.g. regexes, callables,
+        namespaced names or attributes other than a single class and id
+    """
+    if name is None or name is True:
+        names = None
+    elif isinstance(name, str) and name and ':' not in name:
+        names = (name,)
+    elif (isinstance(name, (list, tuple)) and name
+          and all(isinstance(item, str) and item and ':' not in item for item in name)):
+        names = tuple(name)
+    else:
+        return None
+
+    if not isinstance(attrs, dict):
+        return None
+    filters = dict(attrs)
+    filters.update(kwargs)
+    if 'class_' in filters:
+        filters['class'] = filters.pop('class_')
+    if not set(filters) <= {'class', 'id'}:
+        return None
+
+    # None and non-string values filter on absence or need SoupStrainer's matching
+    tag_id = filters.get('id')
+    if 'id' in filters and not isinstance(tag_id, str):
+        return None
+    class_name = filters.get('class')
+    if 'class' in filters and (not isinstance(class_name, str) or class_name.split() != [class_name]):
+        return None
+    return names, tag_id, (class_name,) if class_name is not None else ()
+
+class IndexedTag:
+    """
+    find_all, find, select and select_one answered from the document's DocumentIndex
+
+    Mixed into IndexedElement and IndexedSoup below, and lean_tree's LeanTag and
+    LeanSoup. Selectors selector_planner can plan
+    are matched natively, from the index when the document has one and by a walk that
+    stops at limit otherwise. Other selectors, and find_all filters the index cannot
+    express or elements outside an indexed document, fall through to soupsieve and bs4
+    unchanged. extract, insert (and so append, replace_with, wrap, ...) and item
+    assignment drop the document's index, which is rebuilt by the next query. Changes
+    made behind bs4's back, e.g. to tag.attrs or tag.name directly, need
+    invalidate_index().
+    """
+
+    __slots__ = ()
+
+    # Set on documents that keep an index
+    indexed = False
+
+    def _document(self) -> Optional[Tag]:
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return root if isinstance(root, IndexedTag) and root.indexed else None
+
+    def _document_index(self) -> Optional[DocumentIndex]:
+        document = self._document()
+        if document is None or document.is_xml:
+            return None
+        if document._index is None:
+            document._index = DocumentIndex(document)
+        return document._index
+
+    def invalidate_index(self) -> None:
+        document = self._document()
+        if document is not None:
+            document._index = None
+
+    def find_all(self, name=None, attrs={}, recursive=True, string=None, limit=None, **kwargs):
+        if recursive and string is None:
+            # find() passes bs4's warning stack level along with the filters
+            filters = {key: value for key, value in kwargs.items() if key != '_stacklevel'}
+            query = find_all_query(name, attrs, filters)
+            index = self._document_index() if query is not None else None
+            if index is not None:
+                return ResultSet(SoupStrainer(name, attrs, string, **filters), index.find(self, query, limit))
+        return super().find_all(name, attrs, recursive, string, limit, **kwargs)
+
+    def _select(self, selector, namespaces, limit, kwargs) -> Optional[List[Tag]]:
+        """Planned selection, None when the selector or document needs soupsieve"""
+        plan = selector_plan(selector) if namespaces is None and not kwargs else None
+        if plan is None or self._is_xml:
+            return None
+        index = self._document_index()
+        if index is None or not index.lowercase_names:
+            return plan.select(self, limit)
+        plan = index.plan(plan)
+        return index.find(self, plan.subject.query, limit, plan.matches_context)
+
+    def select(self, selector, namespaces=None, limit=None, **kwargs):
+        found = self._select(selector, namespaces, limit, kwargs)
+        if found is None:
+            return super().select(selector, namespaces, limit, **kwargs)
+        return ResultSet(None, found)
+
+    def select_one(self, selector, namespaces=None, **kwargs):
+        found = self._select(selector, namespaces, 1, kwargs)
+        if found is None:
+            return super().select_one(selector, namespaces, **kwargs)
+        return found[0] if found else None
+
+    def extract(self, *args, **kwargs):
+        self.invalidate_index()
+        return super().extract(*args, **kwargs)
+
+    def insert(self, position, new_child):
+        super().insert(position, new_child)
+        self.invalidate_index()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.invalidate_index()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.invalidate_index()
+
+class IndexedElement(IndexedTag, Tag):
+    """Tag of an IndexedSoup: a plain bs4 Tag whose queries go through the document's index"""
+
+    # Set when the document is indexed; a default keeps Tag.__getattr__ from looking it up as a child
+    _index_position: Optional[int] = None
+
+class IndexedSoup(IndexedTag, BeautifulSoup):
+    """
+    BeautifulSoup answering simple find_all/find/select/select_one queries on the
+    document and its tags from a DocumentIndex built on first use
+
+    The tree is bs4's own, line numbers included; lean_tree.LeanSoup(indexed=True)
+    indexes a lean tree instead. Takes the same arguments as BeautifulSoup.
+    """
+
+    def __init__(self, markup='', features=None, **kwargs):
+        # Set before parsing, which may already extract and insert elements
+        self.indexed = True
+        self._index = None
+        kwargs.setdefault('element_classes', {Tag: IndexedElement})
+        super().__init__(markup, features, **kwargs)
@@ -0,0 +1,166 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+COMPACT_FORMAT = 'delta'
+
+# Keys of the streams API's data payload holding [[timestamp, value], ...] series
+CHART_SERIES_KEYS = ('total', 'daily')
+
+# What array('q') can hold
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+def _to_int(value: Any) -> Optional[int]:
+    """
+    Coerce an API or regex-captured value to an integer, None when it is not a whole number
+
+    Digit strings are parsed exactly; other numeric text, such as '1.0' or '1e3', only when
+    it is integral. Fractions, infinities, NaN and numbers outside the 64-bit range count
+    as not a whole number, so no series is compacted into numbers the full format does
+    not hold.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        number = value
+    else:
+        text = str(value).replace(',', '').strip()
+        try:
+            number = int(text)
+        except ValueError:
+            try:
+                fraction = float(text)
+            except ValueError:
+                return None
+            if not fraction.is_integer():
+                return None
+            number = int(fraction)
+    return number if INT64_MIN <= number <= INT64_MAX else None
+
+def _delta_encode(values: Sequence[int]) -> List[int]:
+    return [values[0]] + [values[i] - values[i - 1] for i in range(1, len(values))] if values else []
+
+def _delta_decode(deltas: Iterable[int]) -> array:
+    values = array('q')
+    running = 0
+    for delta in deltas:
+        running += delta
+        values.append(running)
+    return values
+
+class TimeSeries:
+    def __init__(self, timestamps: Iterable[int] = (), values: Iterable[int] = ()):
+        """
+        Chart series held as parallel 64-bit integer arrays
+
+        A multi-year series is two flat arrays instead of thousands of two-item lists.
+        Timestamps are epoch milliseconds and may be empty for value-only samples.
+
+        Args:
+            timestamps: Epoch milliseconds, one per value, or empty
+            values: Stream counts
+        """
+        self.timestamps = array('q', timestamps)
+        self.values = array('q', values)
+        if self.timestamps and len(self.timestamps) != len(self.values):
+            raise ValueError('timestamps and values must have the same length')
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Sequence[Any]]) -> 'TimeSeries':
+        """
+        Build from the chart API's [[timestamp, value], ...] lists
+
+        Numeric strings such as '1,234' are accepted.
+
+        Raises:
+            ValueError: If a point is not a pair of whole numbers, e.g. holds a null or a fraction
+        """
+        series = cls()
+        for pair in pairs:
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                raise ValueError(f'Malformed time series point: {pair!r}')
+            timestamp, value = _to_int(pair[0]), _to_int(pair[1])
+            if timestamp is None or value is None:
+                raise ValueError(f'Malformed time series point: {pair!r}')
+            series.timestamps.append(timestamp)
+            series.values.append(value)
+        return series
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> 'TimeSeries':
+        """
+        Build a value-only series, e.g. from regex-captured sample strings
+
+        Raises:
+            ValueError: If a value is not a whole number
+        """
+        series = cls()
+        for value in values:
+            number = _to_int(value)
+            if number is None:
+                raise ValueError(f'Malformed time series value: {value!r}')
+            series.values.append(number)
+        return series
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_pairs(self) -> List[List[int]]:
+        """The chart API's [[timestamp, value], ...] layout"""
+        if not self.timestamps:
+            return [[i, value] for i, value in enumerate(self.values)]
+        return [[timestamp, value] for timestamp, value in zip(self.timestamps, self.values)]
+
+    def encode(self) -> Dict[str, Any]:
+        """
+        Delta-encode both arrays for transport
+
+        Daily timestamps become a run of 86400000s and cumulative totals become daily
+        counts, which serialize to far fewer digits than the absolute numbers. Decoding
+        restores the integers exactly.
+        """
+        return {
+            'format': COMPACT_FORMAT,
+            'count': len(self.values),
+            'timestamps': _delta_encode(self.timestamps),
+            'values': _delta_encode(self.values)
+        }
+
+    @classmethod
+    def decode(cls, payload: Dict[str, Any]) -> 'TimeSeries':
+        """Reverse encode()"""
+        if payload.get('format') != COMPACT_FORMAT:
+            raise ValueError(f"Unsupported time series format: {payload.get('format')}")
+        return cls(_delta_decode(payload.get('timestamps', [])), _delta_decode(payload.get('values', [])))
+
+def _compact_series(encode, series: Any) -> Any:
+    """encode(series), or series unchanged when it holds points the compact format cannot carry"""
+    if not isinstance(series, list):
+        return series
+    try:
+        return encode(series).encode()
+    except (ValueError, OverflowError):
+        # Left in the full layout rather than losing nulls, fractions or malformed points
+        return series
+
+def compact_chart_data(data: Any) -> Any:
+    """
+    Delta-encode the CHART_SERIES_KEYS series of every streams API data payload in data
+
+    data may be the payload itself or a result nesting it at any depth. Other values,
+    and series with null, fractional or malformed points, are passed through unchanged.
+    """
+    if isinstance(data, dict):
+        return {
+            key: _compact_series(TimeSeries.from_pairs, value) if key in CHART_SERIES_KEYS
+            else compact_chart_data(value)
+            for key, value in data.items()
+        }
+    return data
+
+def compact_streaming_data(streaming_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Delta-encode the sample series scraped from a track page's chart script"""
+    compact = dict(streaming_data)
+    for key in ('sample_total_data', 'sample_daily_data'):
+        if key in compact:
+            compact[key] = _compact_series(TimeSeries.from_values, compact[key])
+    return compact